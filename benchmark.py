@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Benchmark do gerador: corpus sintético + builds frio, quente e edição de um arquivo.
+
+Uso:
+    python benchmark.py                                # 100, 1k e 10k artigos
+    python benchmark.py --sizes 100,1000 -j 8 --output bench.json
+    python benchmark.py --sizes 1000 --compare bench.json --threshold 0.15
+    python benchmark.py generate /tmp/corpus -n 500    # só gera o corpus
+"""
+import argparse, json, os, platform, random, shutil, subprocess, sys, tempfile, time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+CATEGORIES = ["Tecnologia", "Programação", "Matemática", "Religião", "Internet", "Música",
+              "Cinema", "Livros", "Linux", "Segurança", "Hardware", "Opinião"]
+WORDS = ("sistema dados código função valor tempo página exemplo projeto estrutura memória "
+         "processo arquivo rede usuário servidor cliente consulta índice árvore grafo lista "
+         "matriz número resultado análise método teoria prática versão módulo").split()
+LANGS = {
+    "python": "def soma(a, b):\n    return a + b\n\nprint(soma(2, 3))",
+    "javascript": "const dobro = xs => xs.map(x => x * 2);\nconsole.log(dobro([1, 2, 3]));",
+    "sql": "SELECT nome, COUNT(*) AS total\nFROM pedidos\nGROUP BY nome\nORDER BY total DESC;",
+    "bash": "for f in *.md; do\n  wc -w \"$f\"\ndone",
+}
+MATH = [r"\int_0^1 x^2\,dx = \frac{1}{3}", r"\sum_{k=1}^{n} k = \frac{n(n+1)}{2}",
+        r"e^{i\pi} + 1 = 0", r"\nabla \cdot \mathbf{E} = \frac{\rho}{\varepsilon_0}"]
+
+# =============================================================================
+# CORPUS
+# =============================================================================
+
+def _sentence(rng, n=12):
+    words = [rng.choice(WORDS) for _ in range(n)]
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(rng.randint(2, 5)))
+
+def _body(rng, i):
+    """Corpo misto: títulos, parágrafos, código, math, tabela, notas de rodapé e shortcodes"""
+    parts, notes = [], 0
+    for section in range(rng.randint(2, 5)):
+        parts.append(f"## Seção {section + 1} {rng.choice(WORDS)}")
+        parts.append(_paragraph(rng))
+        kind = rng.random()
+        if kind < 0.3:
+            lang = rng.choice(list(LANGS))
+            parts.append(f"```{lang}\n{LANGS[lang]}\n```")
+        elif kind < 0.45:
+            parts.append(f"$$\n{rng.choice(MATH)}\n$$")
+            parts.append(f"Também inline: ${rng.choice(MATH)}$ no meio do texto.")
+        elif kind < 0.6:
+            rows = "\n".join(f"| {rng.choice(WORDS)} | {rng.randint(1, 999)} | {rng.random():.3f} |"
+                             for _ in range(rng.randint(2, 6)))
+            parts.append(f"| Nome | Qtd | Taxa |\n|:-----|----:|-----:|\n{rows}")
+        elif kind < 0.75:
+            notes += 1
+            parts.append(f"{_sentence(rng)} Veja a nota[^{notes}].")
+        elif kind < 0.85:
+            parts.append("\n".join(f"- [{'x' if rng.random() < 0.5 else ' '}] {_sentence(rng, 5)}" for _ in range(3)))
+        else:
+            parts.append("\n".join(f"{n + 1}. [{rng.choice(WORDS)}](https://example.com/{i}/{n})" for n in range(3)))
+    if rng.random() < 0.05:
+        parts.append(rng.choice(["{{< category >}}", "{{< serieslist >}}"]))
+    parts += [f"[^{n}]: {_sentence(rng, 6)}" for n in range(1, notes + 1)]
+    return "\n\n".join(parts) + "\n"
+
+def generate_corpus(dest, n, seed=42):
+    """Escreve n artigos em dest/content (um terço em séries com partes) e retorna o total de páginas"""
+    rng = random.Random(seed)
+    content = Path(dest) / "content"
+    if content.exists():
+        shutil.rmtree(content)
+    (content / "articles").mkdir(parents=True)
+    start = date(2015, 1, 1)
+    series = [f"Série {rng.choice(WORDS).title()} {k}" for k in range(max(1, n // 24))]
+    parts = {s: 0 for s in series}
+
+    for i in range(n):
+        cats = rng.sample(CATEGORIES, rng.randint(1, 3))
+        fm = ["---", f"title: Artigo {i} sobre {rng.choice(WORDS)}",
+              f"date: {start + timedelta(days=rng.randint(0, 3650))}",
+              f"category: [{', '.join(cats)}]"]
+        folder = content / "articles"
+        if rng.random() < 0.33:
+            serie = rng.choice(series)
+            parts[serie] += 1
+            fm += [f"series: {serie}", f"part: {parts[serie]}"]
+            folder = content / "series" / serie
+            folder.mkdir(parents=True, exist_ok=True)
+        if rng.random() < 0.3:
+            fm.append(f"subtitle: {_sentence(rng, 6)}")
+        fm.append("---")
+        (folder / f"artigo-{i:05d}.md").write_text("\n".join(fm) + "\n\n" + _body(rng, i), encoding="utf-8")
+
+    (content / "_index.md").write_text(
+        "---\ntitle: Benchmark\n---\n\n## Artigos\n\n{{< artlist >}}\n\n## Séries\n\n{{< serieslist >}}\n\n"
+        "## Categorias\n\n{{< category >}}\n", encoding="utf-8")
+    for name in ["sobre", "projetos"]:
+        (content / f"{name}.md").write_text(f"---\ntitle: {name.title()}\n---\n\n{_paragraph(rng)}\n", encoding="utf-8")
+    return n + 2
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def make_workspace(n, seed):
+    """Cópia isolada do projeto (script, gfm.js, layouts, assets) com corpus sintético"""
+    ws = Path(tempfile.mkdtemp(prefix=f"blog-bench-{n}-"))
+    for name in ["blog_generator.py", "gfm.js", "package.json", "package-lock.json"]:
+        shutil.copy2(ROOT / name, ws / name)
+    for name in ["layouts", "static", "images"]:
+        if (ROOT / name).exists():
+            shutil.copytree(ROOT / name, ws / name, ignore=shutil.ignore_patterns("__pycache__"))
+    (ws / "node_modules").symlink_to(ROOT / "node_modules", target_is_directory=True)
+    pages = generate_corpus(ws, n, seed)
+    return ws, pages
+
+def run_build(ws, *args):
+    """Executa um build em subprocesso; retorna (segundos, pico de RSS em MB ou None)"""
+    cmd = [sys.executable, str(ws / "blog_generator.py"), *args]
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=ws, stdout=subprocess.DEVNULL, stderr=stderr)
+        if hasattr(os, "wait4"):
+            # wait4 devolve o rusage do build (o maior RSS entre ele e os workers Node que ele esperou)
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            rss = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+        else:
+            proc.wait()
+            rss = None
+        elapsed = time.perf_counter() - start
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"Build falhou ({' '.join(args)}): {stderr.read().decode(errors='replace')}")
+    return elapsed, rss
+
+def bench_size(n, jobs, seed, keep=False):
+    ws, pages = make_workspace(n, seed)
+    print(f"[{n}] corpus em {ws}")
+    jobs_args = ["-j", str(jobs)]
+    results = []
+    try:
+        scenarios = [
+            ("frio", ["build", *jobs_args]),
+            ("quente", ["build", *jobs_args]),
+            ("edição de um arquivo", None),
+        ]
+        for name, args in scenarios:
+            if name == "frio":
+                shutil.rmtree(ws / ".cache", ignore_errors=True)
+                shutil.rmtree(ws / ".releases", ignore_errors=True)
+                (ws / "public").unlink(missing_ok=True)  # symlink para a release publicada
+            if args is None:
+                target = sorted((ws / "content" / "articles").glob("*.md"))[n // 4 if n > 4 else 0]
+                with target.open("a", encoding="utf-8") as f:
+                    f.write("\nParágrafo acrescentado pelo benchmark.\n")
+                args = ["build", "--incremental", *jobs_args]
+            elapsed, rss = run_build(ws, *args)
+            results.append({"size": n, "scenario": name, "pages": pages, "wall_s": round(elapsed, 3),
+                            "peak_rss_mb": round(rss, 1) if rss is not None else None,
+                            "pages_per_s": round(pages / elapsed, 1)})
+            r = results[-1]
+            print(f"[{n}] {name:<22}{r['wall_s']:>9.2f}s {r['pages_per_s']:>10.1f} pág/s"
+                  f"{'' if rss is None else f'  RSS {rss:.0f} MB':>14}")
+    finally:
+        if not keep:
+            shutil.rmtree(ws, ignore_errors=True)
+    return results
+
+def compare(results, baseline_path, threshold):
+    """Compara wall_s com um JSON anterior; retorna as regressões acima de threshold"""
+    baseline = {(r["size"], r["scenario"]): r for r in json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get((r["size"], r["scenario"]))
+        if not old:
+            continue
+        delta = r["wall_s"] / old["wall_s"] - 1 if old["wall_s"] else 0.0
+        flag = "REGRESSÃO" if delta > threshold else "ok"
+        print(f"[{r['size']}] {r['scenario']:<22}{old['wall_s']:>9.2f}s -> {r['wall_s']:>7.2f}s ({delta:+.1%}) {flag}")
+        if delta > threshold:
+            regressions.append(r)
+    return regressions
+
+def _node_version():
+    try:
+        return subprocess.run(["node", "--version"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do gerador do blog")
+    sub = parser.add_subparsers(dest="command")
+    gen = sub.add_parser("generate", help="gera apenas o corpus sintético")
+    gen.add_argument("dest", type=Path)
+    gen.add_argument("-n", type=int, default=1000)
+    gen.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sizes", default="100,1000,10000", help="tamanhos do corpus, separados por vírgula")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=ROOT / ".cache" / "bench" / "results.json")
+    parser.add_argument("--compare", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regressão tolerada em wall time (0.10 = 10%%)")
+    parser.add_argument("--keep", action="store_true", help="mantém os diretórios temporários")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        if args.dest.resolve() == ROOT:
+            sys.exit("Recusado: o corpus sintético substituiria o content/ do próprio blog")
+        print(f"{generate_corpus(args.dest, args.n, args.seed)} páginas geradas em {args.dest / 'content'}")
+        sys.exit(0)
+
+    results = []
+    for n in (int(s) for s in args.sizes.split(",") if s.strip()):
+        results += bench_size(n, args.jobs, args.seed, args.keep)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "meta": {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "node": _node_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "jobs": args.jobs, "seed": args.seed},
+        "results": results,
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados gravados em {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
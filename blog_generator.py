@@ -1,12 +1,113 @@
 #!/usr/bin/env python3
-import re, shutil, subprocess, importlib.util, unicodedata, hashlib, time
-from pathlib import Path
+import re, os, sys, shutil, subprocess, importlib.util, inspect, unicodedata, hashlib, time
+import gzip, json, queue, select, stat, struct, threading, collections, mimetypes, traceback
+from html import escape as escape_html
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote, unquote
+from array import array
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from contextlib import contextmanager, nullcontext
+from jinja2 import Environment, FileSystemLoader, meta
 
 # Raiz do projeto (permite rodar de qualquer diretório)
 ROOT = Path(__file__).resolve().parent
 
+# =============================================================================
+# PROFILING
+# =============================================================================
+
+class Profiler:
+    """Coleta spans de tempo por fase e por página para --profile.
+
+    Desativado (padrão), span() devolve um contexto nulo compartilhado: o custo é uma
+    chamada de função. Ativado, cada span vira um evento "X" do formato Chrome trace
+    (abre no Perfetto/chrome://tracing) e alimenta o resumo impresso no fim do build.
+    Shortcodes recebem `span` no namespace do módulo para medir trechos próprios.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.local = threading.local()
+        self.t0 = time.perf_counter()
+        self.current = None
+
+    def enable(self):
+        self.enabled, self.events, self.t0, self.current = True, [], time.perf_counter(), None
+
+    def phase(self, name=None):
+        """Encerra a fase atual do build e inicia `name` (None apenas encerra)"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.current:
+            label, start = self.current
+            self.events.append((f"fase: {label}", start, now - start, threading.get_ident(), None, {}))
+        self.current = (name, now) if name else None
+
+    def span(self, name, **args):
+        return self._span(name, args) if self.enabled else _NULL_SPAN
+
+    def page(self, page):
+        """Atribui os spans desta thread à página até o fim do bloco"""
+        return self._page(page) if self.enabled else _NULL_SPAN
+
+    @contextmanager
+    def _span(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append((name, start, time.perf_counter() - start, threading.get_ident(),
+                                getattr(self.local, "page", None), args))
+
+    @contextmanager
+    def _page(self, page):
+        self.local.page = page
+        try:
+            with self._span("página", {}):
+                yield
+        finally:
+            self.local.page = None
+
+    def write_trace(self, path):
+        events = [{"name": name, "cat": "page" if page else "build", "ph": "X", "pid": os.getpid(), "tid": tid,
+                   "ts": round((start - self.t0) * 1e6, 1), "dur": round(dur * 1e6, 1),
+                   "args": {**({"page": page} if page else {}), **{k: str(v) for k, v in args.items()}}}
+                  for name, start, dur, tid, page, args in self.events]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+    def report(self, top=10):
+        """Tabela de tempo por fase e as `top` páginas mais lentas com o tempo de cada etapa"""
+        totals = collections.defaultdict(lambda: [0, 0.0])
+        pages = collections.defaultdict(lambda: collections.defaultdict(float))
+        for name, _, dur, _, page, _ in self.events:
+            totals[name][0] += 1
+            totals[name][1] += dur
+            if page:
+                pages[page][name] += dur
+        lines = [f"{'Fase / span':<40}{'Qtd':>7}{'Total (s)':>12}{'Média (ms)':>12}"]
+        for name, (count, total) in sorted(totals.items(), key=lambda x: -x[1][1]):
+            lines.append(f"{name[:39]:<40}{count:>7}{total:>12.3f}{total / count * 1000:>12.2f}")
+        stages = ["frontmatter", "shortcodes", "markdown", "template", "escrita"]
+        slowest = sorted(pages.items(), key=lambda x: -x[1]["página"])[:top]
+        if slowest:
+            lines += ["", f"{top} páginas mais lentas (ms):",
+                      f"{'Página':<40}{'total':>9}" + "".join(f"{s:>13}" for s in stages)]
+            for page, times in slowest:
+                lines.append(f"{page[-40:]:<40}{times['página'] * 1000:>9.1f}"
+                             + "".join(f"{times.get(s, 0) * 1000:>13.1f}" for s in stages))
+        return "\n".join(lines)
+
+
+_NULL_SPAN = nullcontext()
+PROFILER = Profiler()
+span = PROFILER.span
+
 # =============================================================================
 # UTILS
 # =============================================================================
@@ -22,46 +123,368 @@ def format_date(date):
     """DD - Mês - YYYY"""
     return f"{date.day:02d} - {['Jan','Fev','Mar','Abr','Mai','Jun','Jul','Ago','Set','Out','Nov','Dez'][date.month-1]} - {date.year}"
 
-def _parse_frontmatter_simple(lines, end_i):
+def _parse_frontmatter_simple(block):
     """Fallback: extrai frontmatter linha a linha (valores com ':' no texto podem quebrar)."""
     fm = {}
-    for line in lines[1:end_i]:
+    for line in block:
         if ":" in line:
             k, v = line.split(":", 1)
             fm[k.strip()] = v.strip()
     return fm
 
+def _load_frontmatter(block):
+    """Interpreta as linhas do bloco YAML. Usa PyYAML se disponível, senão parser simples."""
+    try:
+        import yaml
+        # CSafeLoader (libyaml) é ~10x mais rápido; pesa na 1ª passada de sites grandes
+        return yaml.load("\n".join(block), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+    except Exception:
+        return _parse_frontmatter_simple(block)
 
-def parse_frontmatter(content):
-    """Extrai YAML frontmatter. Usa PyYAML se disponível, senão parser simples."""
+def split_frontmatter(content):
+    """Separa (linhas do bloco YAML ou None, corpo) sem interpretar o YAML"""
     lines = content.strip().splitlines()
     if not lines or lines[0] != "---":
-        return {}, content
+        return None, content
 
     for i, line in enumerate(lines[1:], 1):
         if line.strip() == "---":
-            yaml_block = "\n".join(lines[1:i])
-            body = "\n".join(lines[i + 1:]).strip()
-            try:
-                import yaml
-                fm = yaml.safe_load(yaml_block) or {}
-            except Exception:
-                fm = _parse_frontmatter_simple(lines, i)
-            return fm, body
-    return {}, content
-
-def render_markdown(md):
-    """Renderiza markdown via Node.js"""
-    gfm_script = ROOT / "gfm.js"
-    try:
-        if subprocess.run(["node", "--version"], capture_output=True, timeout=5).returncode != 0:
-            raise RuntimeError("Node.js não está instalado")
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        raise RuntimeError("Node.js não encontrado ou timeout")
+            return lines[1:i], "\n".join(lines[i + 1:]).strip()
+    return None, content
 
+
+def parse_frontmatter(content):
+    """Extrai YAML frontmatter. Usa PyYAML se disponível, senão parser simples."""
+    block, body = split_frontmatter(content)
+    return ({} if block is None else _load_frontmatter(block)), body
+
+def read_frontmatter(filepath):
+    """Lê apenas o frontmatter, parando no '---' de fechamento; o corpo não é carregado"""
+    with filepath.open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                break
+        else:
+            return {}
+        if line.lstrip().rstrip("\r\n") != "---":
+            return {}
+        block = []
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.strip() == "---":
+                return _load_frontmatter(block)
+            block.append(line)
+    return {}
+
+def _check_node(gfm_script):
+    if shutil.which("node") is None:
+        raise RuntimeError("Node.js não encontrado")
     if not gfm_script.exists():
         raise RuntimeError("Arquivo gfm.js não encontrado")
 
+
+class _NodeWorker:
+    """Processo `node gfm.js --worker` com uma thread lendo os frames de resposta."""
+
+    def __init__(self, gfm_script):
+        try:
+            self.proc = subprocess.Popen(
+                ["node", str(gfm_script), "--worker"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                cwd=str(ROOT),
+            )
+        except OSError as e:
+            raise RuntimeError(f"Falha ao iniciar Node.js: {e}")
+        self.responses = queue.Queue()
+        self.cold = True  # primeiro documento inclui o carregamento do markdown-it/KaTeX/hljs
+        self.stderr_tail = collections.deque(maxlen=20)
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_exact(self, n):
+        buf = b""
+        while len(buf) < n:
+            chunk = self.proc.stdout.read(n - len(buf))
+            if not chunk:
+                return None
+            buf += chunk
+        return buf
+
+    def _read_stdout(self):
+        while True:
+            header = self._read_exact(5)
+            body = header and self._read_exact(struct.unpack(">I", header[1:])[0])
+            if body is None:
+                self.responses.put(None)  # processo encerrou
+                return
+            self.responses.put((header[0], body.decode("utf-8")))
+
+    def _read_stderr(self):
+        for line in self.proc.stderr:
+            self.stderr_tail.append(line.decode("utf-8", "replace").rstrip())
+
+    def render(self, md, timeout):
+        data = md.encode("utf-8")
+        try:
+            self.proc.stdin.write(struct.pack(">I", len(data)) + data)
+            self.proc.stdin.flush()
+        except OSError:
+            return None
+        try:
+            return self.responses.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=2)
+        except Exception:
+            self.proc.kill()
+
+    def kill(self):
+        self.proc.kill()
+        self.proc.wait()
+
+
+class NodeRenderPool:
+    """Pool de workers Node persistentes para renderizar markdown sem custo de cold start.
+
+    Os workers são criados sob demanda, até `size`, e reaproveitados pelo build inteiro
+    (ou pela sessão de watch); builds 100% em cache nunca sobem o Node. Um worker que
+    morre é substituído e o documento é reenviado uma vez; cada documento tem seu timeout.
+    """
+
+    def __init__(self, size=None, timeout=30):
+        self.gfm_script = ROOT / "gfm.js"
+        _check_node(self.gfm_script)
+        self.timeout = timeout
+        self.size = size or min(4, os.cpu_count() or 1)
+        self.idle = queue.Queue()
+        self.workers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if len(self.workers) < self.size:
+                        worker = _NodeWorker(self.gfm_script)
+                        self.workers.append(worker)
+                        return worker
+                worker = self.idle.get()
+            if worker is not None:  # None: um worker foi descartado, tenta criar outro
+                return worker
+
+    def _discard(self, worker):
+        worker.kill()
+        with self._lock:
+            self.workers.remove(worker)
+        self.idle.put(None)
+
+    def render(self, md):
+        for attempt in range(2):
+            worker = self._acquire()
+            try:
+                with span("node: cold start" if worker.cold else "node: render"):
+                    result = worker.render(md, self.timeout)
+                worker.cold = False
+            except TimeoutError:
+                self._discard(worker)
+                raise RuntimeError(f"Timeout ao processar markdown (>{self.timeout}s)")
+            if result is None:
+                stderr = "\n".join(worker.stderr_tail)
+                self._discard(worker)
+                if attempt:
+                    raise RuntimeError(f"Worker Node.js encerrou inesperadamente: {stderr}")
+                continue
+            self.idle.put(worker)
+            status, body = result
+            if status != 0:
+                raise RuntimeError(body)
+            return body
+
+    def close(self):
+        with self._lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers.clear()
+            self.idle = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Caminho rápido: markdown "simples" (parágrafos, títulos, listas planas, links, ênfase com *)
+# é renderizado em Python, sem subir o Node. A saída replica a do gfm.js (markdown-it com
+# typographer, linkify, emoji, anchor...) nesse subconjunto; qualquer sintaxe fora dele, ou que
+# algum plugin trataria (math, cercas de código, tabelas, notas, tarefas, {atributos}, !!spoiler!!,
+# HTML, imagens, aspas retas, emojis, URLs soltas), manda o documento inteiro para o gfm.js.
+# Espaços além de " " (tab, \v, \f, NBSP e outros Unicode) também: str.strip() os remove,
+# o markdown-it não (ou só em parte).
+# `python blog_generator.py check-markdown` compara os dois renderizadores sobre o content/
+# e sobre _FAST_SAMPLES (casos que já divergiram).
+_FAST_UNSAFE = re.compile(
+    r"[$`\\{}|<~^_\"'@\0]|[^\S \n]|\ufeff|!!|!\[|==|\+\+|&#|&\w+;|://|www\.|\w\.[A-Za-z]{2,}"  # plugins, HTML, linkify
+    r"|:[\w+-]+:|[:;][()\[\]|/\\*@DPpOoSsZz$'\",-]|[8xX]-[)|]|,:|\*\*\*"          # emojis e atalhos
+)
+_FAST_LINK = re.compile(r"\[([^\[\]]+)\]\(((?:https?://|/|#)[A-Za-z0-9/#?=&.:_~+-]*)\)")
+_FAST_EMPHASIS = re.compile(r"(?<![\w*])\*\*(?=\w)([^*]+?)(?<=\w)\*\*(?![\w*])"
+                            r"|(?<![\w*])\*(?=\w)([^*]+?)(?<=\w)\*(?![\w*])")
+_FAST_HEADING = re.compile(r"(#{1,6}) +(\S.*)")
+_FAST_ITEM = re.compile(r"(?:([-*+])|(\d{1,9})\.) {1,4}(\S.*)")
+_FAST_BLOCK_START = re.compile(r"[ >#=:|<`~]|[-_*]\s*$|-{2,}|\d+[.)](\s|$)|[-*+](\s|$)")
+_FAST_ABBR = {"c": "©", "r": "®", "tm": "™"}
+
+_FAST_SAMPLES = [
+    "a\n\xa0\nb", "\xa0texto", "texto\xa0", "a\u2009b\n\u2009\nc", "\u202ftexto", "\u3000texto\n\u3000",
+    "\u2003texto", "\ufefftexto", "a\n\v\nb", "\vtexto", "a\n\f\nb", "\ftexto", "# título\xa0",
+    "- item\xa0\n- \xa0item",
+]
+
+class _NotSimple(Exception):
+    pass
+
+def _fast_typographer(text):
+    """Substituições do typographer do markdown-it 14 (rules_core/replacements)"""
+    text = re.sub(r"\((c|tm|r)\)", lambda m: _FAST_ABBR[m.group(1).lower()], text, flags=re.I)
+    if re.search(r"\+-|\.\.|\?\?\?\?|!!!!|,,|--", text):
+        text = re.sub(r"\+-", "±", text)
+        text = re.sub(r"([?!])…", r"\1..", re.sub(r"\.{2,}", "…", text))
+        text = re.sub(r"([?!]){4,}", r"\1\1\1", text)
+        text = re.sub(r",{2,}", ",", text)
+        text = re.sub(r"(^|[^-])---(?=[^-]|$)", "\\1\u2014", text, flags=re.M)
+        text = re.sub(r"(^|\s)--(?=\s|$)", "\\1\u2013", text, flags=re.M)
+        text = re.sub(r"(^|[^-\s])--(?=[^-\s]|$)", "\\1\u2013", text, flags=re.M)
+    return text
+
+def _fast_escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+def _fast_text(text, plain):
+    if "*" in text or "[" in text or "]" in text:
+        raise _NotSimple  # ênfase ou colchetes que o subconjunto não resolve
+    text = _fast_typographer(text)
+    plain.append(text)
+    return _fast_escape(text)
+
+def _fast_emphasis(text, plain):
+    out, pos = [], 0
+    for m in _FAST_EMPHASIS.finditer(text):
+        tag, inner = ("strong", m.group(1)) if m.group(1) is not None else ("em", m.group(2))
+        out += [_fast_text(text[pos:m.start()], plain), f"<{tag}>{_fast_text(inner, plain)}</{tag}>"]
+        pos = m.end()
+    return "".join(out) + _fast_text(text[pos:], plain)
+
+def _fast_inline(text, plain):
+    """Links e ênfase; plain acumula o texto puro (usado no id dos títulos)"""
+    out, pos = [], 0
+    for m in _FAST_LINK.finditer(text):
+        external = ' target="_blank" rel="noopener noreferrer"' if m.group(2).startswith(("http://", "https://")) else ""
+        out += [_fast_emphasis(text[pos:m.start()], plain),
+                f'<a href="{_fast_escape(m.group(2))}"{external}>{_fast_emphasis(m.group(1), plain)}</a>']
+        pos = m.end()
+    return "".join(out) + _fast_emphasis(text[pos:], plain)
+
+def _fast_slug(text, used):
+    """slugify do markdown-it-anchor (encodeURIComponent), com sufixo -1, -2... nos repetidos"""
+    slug = quote(re.sub(r"\s+", "-", text.strip().lower()), safe="-_.!~*'()")
+    unique, i = slug, 1
+    while unique in used:
+        unique, i = f"{slug}-{i}", i + 1
+    used.add(unique)
+    return unique
+
+def render_simple_markdown(md):
+    """Renderiza o subconjunto simples em Python; None se o documento precisa do gfm.js"""
+    md = re.sub(r"\r\n?", "\n", md)
+    if not md.strip():
+        return ""
+    if _FAST_UNSAFE.search(_FAST_LINK.sub(r"[\1]", md)):
+        return None
+
+    html, para, slugs = [], [], set()
+    items = None  # (tag, marcador, início, [itens])
+    def flush():
+        nonlocal items
+        if para:
+            html.append(f"<p>{_fast_inline(chr(10).join(para), [])}</p>\n")
+            para.clear()
+        if items:
+            tag, _, start, lis = items
+            attr = f' start="{start}"' if tag == "ol" and start != 1 else ""
+            html.append(f"<{tag}{attr}>\n" + "".join(f"<li>{li}</li>\n" for li in lis) + f"</{tag}>\n")
+            items = None
+
+    try:
+        blank = True
+        for line in md.split("\n"):
+            if not line.strip():
+                blank = True
+                continue
+            if line.endswith("  "):
+                raise _NotSimple  # quebra de linha forçada
+            line = line.rstrip()
+            heading, item = _FAST_HEADING.fullmatch(line), _FAST_ITEM.fullmatch(line)
+            if heading:
+                if heading.group(2).endswith("#"):
+                    raise _NotSimple
+                flush()
+                plain = []
+                content = _fast_inline(heading.group(2).strip(), plain)
+                slug, level = _fast_slug("".join(plain), slugs), len(heading.group(1))
+                html.append(f'<h{level} id="{slug}" tabindex="-1">{content} '
+                            f'<a class="header-anchor" href="#{slug}" aria-hidden="true">#</a></h{level}>\n')
+            elif item:
+                bullet, number, text = item.groups()
+                # Item aninhado, lista frouxa ou que interrompe parágrafo: regras demais para o atalho
+                if _FAST_BLOCK_START.match(text) or (para and not blank):
+                    raise _NotSimple
+                if items is not None and (blank or items[1] != (bullet or ".")):
+                    raise _NotSimple
+                if items is None:
+                    flush()
+                    items = ("ul" if bullet else "ol", bullet or ".", int(number or 1), [])
+                items[3].append(_fast_inline(text, []))
+            else:
+                if _FAST_BLOCK_START.match(line) or (items is not None and not blank):
+                    raise _NotSimple  # continuação preguiçosa de item ou bloco especial
+                if blank:
+                    flush()
+                para.append(line)
+            blank = False
+        flush()
+    except _NotSimple:
+        return None
+    return "".join(html)
+
+
+def render_markdown(md, pool=None, cache=None):
+    """Renderiza markdown via Node.js (pool persistente se informado, senão processo avulso)
+
+    Documentos simples (ver render_simple_markdown) são renderizados em Python, sem Node.
+    """
+    with span("caminho rápido"):
+        html = render_simple_markdown(md)
+    if html is not None:
+        return html
+    if cache is not None:
+        with span("cache: leitura"):
+            html = cache.get(md)
+        if html is None:
+            html = render_markdown(md, pool)
+            cache.put(md, html)
+        return html
+    if pool is not None:
+        return pool.render(md)
+
+    gfm_script = ROOT / "gfm.js"
+    _check_node(gfm_script)
     try:
         result = subprocess.run(
             ["node", str(gfm_script)],
@@ -78,8 +501,181 @@ def render_markdown(md):
     except subprocess.TimeoutExpired:
         raise RuntimeError("Timeout ao processar markdown (>30s)")
 
+def check_markdown(paths, pool):
+    """Compara render_simple_markdown com o gfm.js em cada documento (e em cada bloco separado
+    por linha em branco) dos .md em paths; retorna a lista de divergências"""
+    samples = []
+    for path in paths:
+        for f in sorted(Path(path).rglob("*.md")) if Path(path).is_dir() else [Path(path)]:
+            body = split_frontmatter(f.read_text(encoding="utf-8"))[1]
+            samples += [(f, body)] + [(f, block) for block in re.split(r"\n\s*\n", body) if block.strip()]
+    samples += [(Path("<_FAST_SAMPLES>"), md) for md in _FAST_SAMPLES]
+
+    fast = node = 0.0
+    simple, failures = 0, []
+    for f, md in samples:
+        start = time.perf_counter()
+        html = render_simple_markdown(md)
+        if html is None:
+            continue
+        fast += time.perf_counter() - start
+        simple += 1
+        start = time.perf_counter()
+        expected = pool.render(md)
+        node += time.perf_counter() - start
+        if html != expected:
+            failures.append((f, md, html, expected))
+    print(f"Caminho rápido: {simple} de {len(samples)} amostras, {len(failures)} divergências "
+          f"(Python {fast * 1000:.1f} ms, Node {node * 1000:.1f} ms nas amostras simples)")
+    return failures
+
+def renderer_fingerprint():
+    """Hash de gfm.js + versões dos pacotes de markdown-it/KaTeX/highlight.js em package-lock.json"""
+    h = hashlib.sha256()
+    gfm_script = ROOT / "gfm.js"
+    if gfm_script.exists():
+        h.update(gfm_script.read_bytes())
+    lock = ROOT / "package-lock.json"
+    if lock.exists():
+        packages = json.loads(lock.read_text(encoding="utf-8")).get("packages", {})
+        for name in sorted(packages):
+            pkg = name.rsplit("node_modules/", 1)[-1]
+            if name.count("node_modules/") == 1 and pkg.startswith(("markdown-it", "katex", "highlight.js")):
+                h.update(f"{pkg}@{packages[name].get('version')}\n".encode())
+    return h.hexdigest()
+
+
+class RenderCache:
+    """Cache em disco do HTML renderizado, endereçado pelo hash do markdown (pós-shortcodes).
+
+    A chave inclui renderer_fingerprint(), então mudar gfm.js ou atualizar um plugin
+    invalida tudo. O mtime de cada entrada marca o último uso; prune() remove as menos
+    usadas recentemente até o total caber em max_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024, fingerprint=None):
+        self.dir = Path(cache_dir) if cache_dir else ROOT / ".cache" / "render"
+        self.max_bytes = max_bytes
+        self.fingerprint = renderer_fingerprint() if fingerprint is None else fingerprint
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def _path(self, md):
+        key = hashlib.sha256(self.fingerprint.encode() + md.encode("utf-8")).hexdigest()
+        return self.dir / key[:2] / f"{key}.html"
+
+    def get(self, md):
+        path = self._path(md)
+        try:
+            html = path.read_text(encoding="utf-8")
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return html
+
+    def put(self, md, html):
+        path = self._path(md)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(html, encoding="utf-8")
+        os.replace(tmp, path)
+
+    def prune(self):
+        """Remove entradas menos usadas recentemente até caber em max_bytes"""
+        if not self.dir.exists():
+            return
+        entries = [(st.st_mtime, st.st_size, f) for f in self.dir.rglob("*.html") for st in [f.stat()]]
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        if self.dir.exists():
+            shutil.rmtree(self.dir)
+
+    def stats(self):
+        return f"Cache de renderização: {self.hits} hits, {self.misses} misses"
+
+
+class SiteIndex:
+    """Índice do site montado uma vez por build e entregue aos shortcodes.
+
+    Guarda as páginas ordenadas por data (mais recente primeiro) e calcula sob demanda,
+    uma única vez, os mapas categoria→posts e série→posts, as ordenações por data e por
+    parte e os slugs. view() cria um índice restrito a um subconjunto (ex. os posts de
+    uma categoria) que compartilha o cache de slugs.
+    """
+
+    def __init__(self, pages, categories=None, slugs=None):
+        self.pages = pages
+        self.articles = [p for p in pages if p.get("is_article", False)]
+        self.categories = sorted(categories if categories is not None
+                                 else set(c for p in self.articles for c in p["categories"]))
+        self._slugs = {} if slugs is None else slugs
+        self.rendered = {}  # invocação de shortcode -> HTML, reaproveitado entre páginas
+
+    def view(self, posts, categories=()):
+        return SiteIndex(posts, list(categories), self._slugs)
+
+    def slug(self, text):
+        if text not in self._slugs:
+            self._slugs[text] = normalize(text)
+        return self._slugs[text]
+
+    @cached_property
+    def articles_by_date(self):
+        return sorted(self.articles, key=lambda x: x.get("timestamp"), reverse=True)
+
+    @cached_property
+    def pages_by_title(self):
+        return sorted((p for p in self.pages if not p.get("is_article", False)), key=lambda x: x.get("title", ""))
+
+    @cached_property
+    def by_category(self):
+        index = {c: [] for c in self.categories}
+        for p in self.articles:
+            for c in p["categories"]:
+                index.setdefault(c, []).append(p)
+        return index
+
+    @cached_property
+    def series(self):
+        return sorted(set(p["series"] for p in self.articles if p["series"]))
+
+    @cached_property
+    def by_series(self):
+        """Série -> posts ordenados por parte (e data, para partes repetidas)"""
+        index = {s: [] for s in self.series}
+        for p in self.articles:
+            if p["series"]:
+                index[p["series"]].append(p)
+        for posts in index.values():
+            posts.sort(key=lambda x: (x["part"], x["timestamp"]))
+        return index
+
+
+def _takes_site(render):
+    try:
+        return next(iter(inspect.signature(render).parameters), None) == "site"
+    except (TypeError, ValueError):
+        return False
+
 def load_shortcodes():
-    """Carrega shortcodes de layouts/shortcodes/"""
+    """Carrega shortcodes de layouts/shortcodes/
+
+    Shortcodes com `render(site)` recebem o SiteIndex; os antigos `render(categories, posts)`
+    continuam funcionando via adaptador que passa site.categories e site.pages.
+    """
     shortcodes, sc_dir = {}, ROOT / "layouts" / "shortcodes"
     if not sc_dir.exists():
         return shortcodes
@@ -90,25 +686,36 @@ def load_shortcodes():
             spec = importlib.util.spec_from_file_location(file.stem, file)
             mod = importlib.util.module_from_spec(spec)
             mod.__dict__['normalize'] = normalize
+            mod.__dict__['span'] = span
             spec.loader.exec_module(mod)
             if hasattr(mod, "render"):
-                shortcodes[file.stem] = mod.render
+                render = mod.render
+                if _takes_site(render):
+                    shortcode = lambda site, render=render: render(site)
+                else:
+                    shortcode = lambda site, render=render: render(site.categories, site.pages)
+                # VOLATILE = True: saída muda com o tempo, build incremental nunca reaproveita
+                shortcode.volatile = getattr(mod, "VOLATILE", False)
+                shortcodes[file.stem] = shortcode
         except Exception as e:
             raise RuntimeError(f"Falha ao carregar shortcode {file.stem}: {e}")
     return shortcodes
 
-def process_shortcodes(content, shortcodes, categories, posts):
-    """Substitui {{< shortcode >}} por HTML"""
+def process_shortcodes(content, shortcodes, site):
+    """Substitui {{< shortcode >}} por HTML (cada invocação distinta é renderizada uma vez por build)"""
     if not shortcodes or '{{<' not in content: return content
     
     def replace(m, inner=None):
         tag = (m.groups()[0] if inner is None else m.group(1)).strip()
         name = tag.split()[0]
         if name not in shortcodes: return m.group(0)
-        try:
-            return shortcodes[name](categories, posts)
-        except Exception as e:
-            raise RuntimeError(f"Erro ao processar shortcode '{name}': {e}")
+        if tag not in site.rendered:
+            try:
+                with span(f"shortcode: {name}"):
+                    site.rendered[tag] = shortcodes[name](site)
+            except Exception as e:
+                raise RuntimeError(f"Erro ao processar shortcode '{name}': {e}")
+        return site.rendered[tag]
     
     content = re.sub(r'{{<\s*([^/>]+?)\s*>}}(.*?){{<\s*/\1\s*>}}', 
                     lambda m: replace(m, True), content, flags=re.DOTALL)
@@ -119,8 +726,9 @@ def process_shortcodes(content, shortcodes, categories, posts):
 # =============================================================================
 
 def load_content_file(filepath, is_article=True):
-    """Carrega arquivo markdown e retorna dados estruturados"""
-    fm, md = parse_frontmatter(filepath.read_text(encoding="utf-8"))
+    """Carrega os metadados de um arquivo markdown (1ª passada: só o frontmatter é lido)"""
+    with span("frontmatter"):
+        fm = read_frontmatter(filepath)
     date_val = fm.get("date")
     if date_val is None:
         date_obj = datetime.now()
@@ -140,9 +748,9 @@ def load_content_file(filepath, is_article=True):
         categories_list = [c.strip() for c in category_str.split(",") if c.strip()] or ["Sem Categoria"]
 
     page_data = {
+        "source": filepath,
         "title": str(fm.get("title") or filepath.stem.replace("-", " ").title()),
         "subtitle": str(fm.get("subtitle") or ""),
-        "raw_content": md,
         "timestamp": date_obj,
         "is_article": is_article,
         "categories": [],
@@ -164,38 +772,966 @@ def load_content_file(filepath, is_article=True):
     
     return page_data
 
-def build_site():
-    """Gera site estático"""
+# O timestamp não entra no digest de listas (páginas sem data usam datetime.now());
+# o corpo nem chega a ser carregado na 1ª passada, então editar só o texto não invalida listas.
+_NON_LIST_FIELDS = {"timestamp"}
+
+def list_digest(items):
+    """Hash dos metadados que listas/taxonomias usam (títulos, urls, datas, categorias...)"""
+    data = [{k: v for k, v in p.items() if k not in _NON_LIST_FIELDS} if isinstance(p, dict) else p
+            for p in items]
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def used_shortcodes(content):
+    return sorted(set(re.findall(r'{{<\s*([^/>\s]+)', content)))
+
+
+class BuildManifest:
+    """Registra as dependências de cada saída em manifest.json (no build, o da release: Releases.state_dir).
+
+    Cada saída (caminho relativo a public/) guarda um hash das suas entradas: arquivo
+    de conteúdo, templates, shortcodes usados e metadados de taxonomia. Num build
+    incremental, só é regerada a saída cujo hash mudou (ou cujo arquivo sumiu).
+    meta guarda o digest de listas de cada página e do site, para o modo watch saber
+    sem percorrer o site se as listas/taxonomias podem mudar (old_meta: do build anterior).
+    """
+
+    def __init__(self, build_key, path=None):
+        self.path = Path(path) if path else ROOT / ".cache" / "manifest.json"
+        self.build_key = build_key
+        try:
+            old = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            old = {}
+        self.old = old.get("outputs", {}) if old.get("build_key") == build_key else {}
+        self.old_meta = old.get("meta", {}) if old.get("build_key") == build_key else {}
+        self.previous = set(old.get("outputs", {}))
+        self.outputs, self.meta = {}, {}
+        self.written = self.skipped = 0
+        self.lock = threading.Lock()
+
+    def is_fresh(self, rel, key, output_dir):
+        return self.old.get(rel) == key and (output_dir / rel).exists()
+
+    def record(self, rel, key):
+        with self.lock:
+            self.outputs[rel] = key
+
+    def carry(self, rel, output_dir):
+        """Mantém o registro do build anterior para uma saída que não precisa ser recalculada"""
+        if rel not in self.old or not (output_dir / rel).exists():
+            return False
+        self.record(rel, self.old[rel])
+        return True
+
+    def count(self, written):
+        with self.lock:
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+
+    def orphans(self):
+        return sorted(self.previous - set(self.outputs))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"build_key": self.build_key, "outputs": self.outputs, "meta": self.meta},
+                                        indent=1, sort_keys=True), encoding="utf-8")
+
+
+class SourceCache:
+    """Hash e shortcodes usados de cada .md, em .cache/sources.json indexados por (tamanho,
+    mtime) como os assets: no build incremental, fontes inalterados não são relidos."""
+
+    def __init__(self, state_path=None):
+        self.state_path = Path(state_path) if state_path else ROOT / ".cache" / "sources.json"
+        try:
+            self.old = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.old = {}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def info(self, path):
+        """(hash do arquivo, shortcodes usados, corpo ou None se o arquivo não foi lido)"""
+        rel, st = path.relative_to(ROOT).as_posix(), path.stat()
+        entry, body = self.old.get(rel), None
+        if not entry or entry[:2] != [st.st_size, st.st_mtime_ns]:
+            with span("leitura"):
+                text = path.read_text(encoding="utf-8")
+            body = split_frontmatter(text)[1]
+            entry = [st.st_size, st.st_mtime_ns, hashlib.sha256(text.encode("utf-8")).hexdigest(), used_shortcodes(body)]
+        with self.lock:
+            self.entries[rel] = entry
+        return entry[2], entry[3], body
+
+    def save(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(self.entries), encoding="utf-8")
+
+
+# Busca: índice invertido gerado no build, dividido em shards por prefixo dos termos.
+# public/search/index.json lista os shards e o total de documentos; <prefixo>.json guarda
+# {termo: ids com delta} e docs-<n>.json os metadados em blocos de SEARCH_DOCS_CHUNK.
+# static/js/search.js baixa só os shards dos termos da consulta.
+SEARCH_PREFIX = 2
+SEARCH_DOCS_CHUNK = 128
+STOPWORDS = set("""
+a o as os um uma uns umas de do da dos das no na nos nas em ao aos e ou que se por para com
+como mas mais sem sob sobre entre ate ja nao sim ser foi sao esta este esse isso isto ele ela
+eles elas seu sua seus suas the of and to in is it for on
+""".split())
+_SEARCH_STRIP = [
+    (re.compile(r"{{<.*?>}}", re.S), " "),          # shortcodes
+    (re.compile(r"</?[A-Za-z][^<>]*>"), " "),        # HTML embutido
+    (re.compile(r"\]\([^)]*\)"), "] "),              # destino de links e imagens
+    (re.compile(r"https?://\S+"), " "),
+]
+
+def search_terms(text):
+    """Termos distintos de um texto, sem acentos e em minúsculas (como em normalize)"""
+    folded = ''.join(c for c in unicodedata.normalize('NFD', text) if not unicodedata.combining(c)).lower()
+    return {t for t in re.findall(r"\w+", folded) if len(t) > 1 and t not in STOPWORDS}
+
+def _shard_key(term):
+    return re.sub(r"[^a-z0-9]", "_", term[:SEARCH_PREFIX])
+
+def _dumps(data):
+    # Sem espaços, chaves ordenadas: mesmo conteúdo -> mesmos bytes entre builds
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+class SearchIndex:
+    """Coleta os termos de cada página (2ª passada) e gera os arquivos de public/search.
+
+    Cada documento guarda só um array('I') com os ids dos seus termos num vocabulário
+    comum (termos internados), não um set por página. O id de cada documento é estável
+    (gravado no estado): num build limpo segue a ordem dos metadados (páginas avulsas ->
+    artigos do mais antigo ao mais novo) e documentos novos recebem os próximos ids, então
+    uma página nova só muda os shards dos seus próprios termos (além de index.json e do
+    último bloco de docs). Ids de documentos removidos ficam como null nos blocos de docs.
+
+    state_path: termos por documento gravados com o hash do fonte (save()); no build
+    seguinte, reuse() aproveita os de fontes inalterados sem reler nem tokenizar o corpo.
+    """
+
+    def __init__(self, state_path=None, key=""):
+        self.vocab, self.terms = {}, []  # termo -> id e id -> termo
+        self.docs = {}  # output -> (página, hash do fonte, ids dos termos)
+        self.old = {}  # output -> (hash do fonte, ids dos termos) do build anterior
+        self.ids = {}  # output -> id do documento nos arquivos gerados
+        self.used = None
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+        self.state_path, self.key = state_path, key
+        if state_path:
+            self._load()
+
+    def _load(self):
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+            blob = array("I", self.state_path.with_suffix(".bin").read_bytes())
+        except (OSError, ValueError):
+            return
+        if state.get("key") != self.key or len(blob) != sum(n for _, n in state["docs"].values()):
+            return
+        self.terms = [sys.intern(t) for t in state["vocab"]]
+        self.vocab = {t: i for i, t in enumerate(self.terms)}
+        self.ids = state.get("ids", {})
+        pos = 0
+        for output, (source_hash, n) in state["docs"].items():
+            self.old[output] = (source_hash, blob[pos:pos + n])
+            pos += n
+
+    def _term_ids(self, terms):
+        ids = array("I")
+        with self.lock:
+            for term in sorted(terms):
+                tid = self.vocab.get(term)
+                if tid is None:
+                    tid = self.vocab[sys.intern(term)] = len(self.terms)
+                    self.terms.append(term)
+                ids.append(tid)
+        return ids
+
+    def add(self, page, body, source_hash=""):
+        start = time.perf_counter()
+        text = body
+        for pattern, repl in _SEARCH_STRIP:
+            text = pattern.sub(repl, text)
+        ids = self._term_ids(search_terms(" ".join([page["title"], page["subtitle"], page.get("category", ""), text])))
+        with self.lock:
+            self.docs[page["output"]] = (page, source_hash, ids)
+            self.seconds += time.perf_counter() - start
+
+    def reuse(self, page, source_hash):
+        """Usa os termos do build anterior se o fonte não mudou; False = chamar add()"""
+        old = self.old.get(page["output"])
+        if old is None or old[0] != source_hash:
+            return False
+        with self.lock:
+            self.docs[page["output"]] = (page, source_hash, old[1])
+        return True
+
+    def remove(self, page):
+        with self.lock:
+            self.docs.pop(page["output"], None)
+
+    def files(self):
+        """{caminho relativo a public/: conteúdo} de todos os arquivos do índice"""
+        self.ids = {output: i for output, i in self.ids.items() if output in self.docs}
+        new = sorted((d for output, d in self.docs.items() if output not in self.ids),
+                     key=lambda d: (d[0]["is_article"], d[0].get("date", ""), d[0]["output"]))
+        for doc_id, (page, _, _) in enumerate(new, max(self.ids.values(), default=-1) + 1):
+            self.ids[page["output"]] = doc_id
+        docs = [None] * (max(self.ids.values(), default=-1) + 1)
+        for output, doc in self.docs.items():
+            docs[self.ids[output]] = doc
+        postings = {}
+        for doc_id, doc in enumerate(docs):
+            if doc is None:
+                continue
+            for tid in doc[2]:
+                posting = postings.get(tid)
+                if posting is None:
+                    posting = postings[tid] = array("I")
+                posting.append(doc_id)
+        self.used = postings.keys()
+
+        shards = {}
+        for tid, ids in postings.items():
+            term = self.terms[tid]
+            shards.setdefault(_shard_key(term), {})[term] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+
+        files = {f"search/{key}.json": _dumps(shard) for key, shard in shards.items()}
+        for start in range(0, len(docs), SEARCH_DOCS_CHUNK):
+            files[f"search/docs-{start // SEARCH_DOCS_CHUNK}.json"] = _dumps([
+                [doc[0]["title"], doc[0]["url"], doc[0].get("formatted_date", "")] if doc else None
+                for doc in docs[start:start + SEARCH_DOCS_CHUNK]])
+        files["search/index.json"] = _dumps({"prefix": SEARCH_PREFIX, "chunk": SEARCH_DOCS_CHUNK,
+                                             "docs": len(docs), "shards": sorted(shards), "stopwords": sorted(STOPWORDS)})
+        return files
+
+    def save(self):
+        """Grava os termos por documento (vocabulário compactado aos termos em uso; chame após files())"""
+        remap = {tid: new for new, tid in enumerate(sorted(self.used if self.used is not None else range(len(self.terms))))}
+        blob, docs = array("I"), {}
+        for output, (_, source_hash, ids) in self.docs.items():
+            blob.extend(remap[tid] for tid in ids)
+            docs[output] = [source_hash, len(ids)]
+        vocab = [None] * len(remap)
+        for tid, new in remap.items():
+            vocab[new] = self.terms[tid]
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.state_path.with_suffix(".bin"), blob.tobytes())
+        ids = {output: self.ids[output] for output in docs if output in self.ids}
+        _write_atomic(self.state_path, json.dumps({"key": self.key, "vocab": vocab, "docs": docs, "ids": ids},
+                                                  ensure_ascii=False).encode("utf-8"))
+
+
+ASSET_DIRS = ["static", "images"]
+PAGE_SIZE = 50  # artigos por página nas listas paginadas
+LIST_SHORTCODES = ["artlist", "pagelist", "serieslist", "search", "category"]
+
+def _touches_assets(paths):
+    return any(p.is_relative_to(ROOT / name) for p in paths for name in ASSET_DIRS)
+
+def _report_assets(result):
+    copied, removed = result
+    if copied or removed:
+        print(f"Assets: {copied} atualizados, {removed} removidos")
+
+
+class AssetPipeline:
+    """Sincroniza static/ e images/ com o output de forma incremental.
+
+    Só copia arquivos cujo tamanho/mtime/hash mudou e remove do output os que sumiram.
+    Os hashes ficam em state_path (assets.json no estado da release), indexados por
+    (tamanho, mtime), para não reler arquivos inalterados. Hardlinks só vêm de previous
+    (a release publicada), nunca das fontes: editar static/ não pode alterar uma release
+    já publicada. Se o hash gravado no estado de previous é o mesmo, o asset vira um
+    hardlink dela sem ler fonte nem destino.
+
+    Com fingerprint=True os arquivos ganham o hash no nome (style.3f9a1c2b.css),
+    public/asset-manifest.json registra o mapeamento e url()/rewrite() trocam as
+    referências em base.html e no HTML renderizado, permitindo cache imutável.
+    minify (um Minifier): CSS é gravado minificado.
+    """
+
+    URL_RE = re.compile(r"""(?<=["'(])/(?:static|images)/[^"'()\s?#]+""")
+
+    def __init__(self, output_dir, fingerprint=False, previous=None, state_path=None, minify=None):
+        self.output_dir = output_dir
+        self.fingerprint = fingerprint
+        self.minify = minify
+        self.previous = previous
+        self.state_path = Path(state_path) if state_path else ROOT / ".cache" / "assets.json"
+        try:
+            self.state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.state = {}
+        self.published = self.state if previous else {}  # estado gravado pela release previous
+        self.files = {}  # caminho relativo de origem -> (Path, stat, sha256)
+        self.urls = {}
+        self.scan()
+
+    def scan(self):
+        state, self.files = {}, {}
+        for name in ASSET_DIRS:
+            src_dir = ROOT / name
+            if not src_dir.exists():
+                continue
+            for src in src_dir.rglob("*"):
+                if not src.is_file() or _ignored(src):
+                    continue
+                rel = src.relative_to(ROOT).as_posix()
+                st = src.stat()
+                cached = self.state.get(rel)
+                if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+                    digest = cached[2]
+                else:
+                    digest = hashlib.sha256(src.read_bytes()).hexdigest()
+                # O 4º campo diz se a saída foi minificada (o hash é sempre o do fonte)
+                state[rel] = [st.st_size, st.st_mtime_ns, digest, bool(self.minify and src.suffix == ".css")]
+                self.files[rel] = (src, st, digest)
+        self.state = state
+        self.urls = {}
+        if self.fingerprint:
+            for rel, (src, _, digest) in self.files.items():
+                self.urls[f"/{rel}"] = f"/{PurePosixPath(rel).with_name(f'{src.stem}.{digest[:8]}{src.suffix}')}"
+
+    def url(self, path):
+        """URL pública de um asset (com hash no nome se fingerprint estiver ativo)"""
+        return self.urls.get(path, path)
+
+    def rewrite(self, html):
+        if not self.urls:
+            return html
+        def replace(m):
+            url = m.group(0)
+            hashed = self.urls.get(unquote(url))
+            if hashed is None:
+                return url
+            return hashed if url == unquote(url) else quote(hashed)
+        return self.URL_RE.sub(replace, html)
+
+    def digest(self):
+        """Hash do mapeamento de URLs: páginas dependem dele quando fingerprint está ativo"""
+        return hashlib.sha256(json.dumps(self.urls, sort_keys=True).encode()).hexdigest() if self.urls else ""
+
+    def _install(self, dest, data, st=None):
+        previous = self.previous / dest.relative_to(self.output_dir) if self.previous else None
+        _write_output(dest, data, previous)
+        if st is not None:
+            os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))  # o próximo sync compara só o stat
+
+    def _link_published(self, rel, dest):
+        """Hardlink da release publicada quando ela tem o mesmo conteúdo (hash no estado dela)"""
+        old = self.published.get(rel)
+        source = self.previous / dest.relative_to(self.output_dir) if old and old[2:] == self.state[rel][2:] else None
+        if source is None or not source.is_file():
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.tmp")
+        tmp.unlink(missing_ok=True)
+        _link_or_copy(source, tmp)
+        os.replace(tmp, dest)
+        return True
+
+    def sync(self):
+        """Copia o que mudou, remove o que sumiu e retorna (copiados, removidos)"""
+        expected, copied, removed = set(), 0, 0
+        for rel, (src, st, digest) in self.files.items():
+            dest = self.output_dir / self.url(f"/{rel}").lstrip("/")
+            expected.add(dest)
+            try:
+                dst = dest.stat()
+            except OSError:
+                dst = None
+            if self.minify and dest.suffix == ".css":
+                data = self.minify(src.read_text(encoding="utf-8"), "css").encode("utf-8")
+                if not (dst and dst.st_size == len(data) and dest.read_bytes() == data):
+                    self._install(dest, data)
+                    copied += 1
+                continue
+            if dst and dst.st_size == st.st_size:
+                if dst.st_mtime_ns == st.st_mtime_ns:
+                    continue
+                if hashlib.sha256(dest.read_bytes()).hexdigest() == digest:
+                    os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+                    continue
+            if dst is None and self._link_published(rel, dest):
+                continue
+            self._install(dest, src.read_bytes(), st)
+            copied += 1
+
+        for name in ASSET_DIRS:
+            out = self.output_dir / name
+            if not out.exists():
+                continue
+            for path in sorted(out.rglob("*"), reverse=True):
+                if path.is_dir():
+                    if not any(path.iterdir()):
+                        path.rmdir()
+                elif path not in expected and not (path.suffix in (".gz", ".br") and path.with_suffix("") in expected):
+                    path.unlink()  # irmãos .gz/.br de assets existentes ficam para o precompress
+                    removed += 1
+
+        manifest = self.output_dir / "asset-manifest.json"
+        if self.fingerprint:
+            _write_atomic(manifest, json.dumps(self.urls, indent=1, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        else:
+            manifest.unlink(missing_ok=True)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(self.state), encoding="utf-8")
+        return copied, removed
+
+# Minificação (--minify): só espaços entre tags que o layout descarta e comentários;
+# <pre>, <code>, <textarea>, <script>, <style> e o MathML do KaTeX (<math>, com o TeX
+# original em <annotation>) passam intactos. Espaço entre elementos que o CSS pode
+# tornar inline (li, div, nav, a...) vira um espaço só, nunca some.
+_MIN_PROTECT = re.compile(r"<(pre|code|textarea|script|style|math)\b.*?</\1\s*>", re.S | re.I)
+_MIN_TOKEN = re.compile(r"""<!--.*?-->|<[!/]?[A-Za-z](?:[^<>"']|"[^"]*"|'[^']*')*>|[^<]+|<""", re.S)
+_MIN_SPACE = re.compile(r"[ \t\n\r\f]+")  # \s também casaria &nbsp; (U+00A0)
+_MIN_ATTR = re.compile(r"""("[^"]*"|'[^']*')|([ \t\n\r\f]+)(?=>)|[ \t\n\r\f]+""")
+# Espaço ao lado destes some (fim/início de linha ou fora do fluxo de texto)
+_MIN_EDGE = {"!doctype", "html", "head", "body", "meta", "link", "title", "script", "style", "base",
+             "table", "caption", "colgroup", "col", "thead", "tbody", "tfoot", "tr", "td", "th", "br"}
+# ... e entre dois destes (blocos que o style.css não torna inline)
+_MIN_BLOCK = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "dl", "blockquote", "pre", "hr",
+              "main", "header", "footer", "section", "article"}
+_MIN_CSS_STRING = r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')"""
+_MIN_CSS_COMMENT = re.compile(_MIN_CSS_STRING + r"|/\*.*?\*/", re.S)
+_MIN_CSS = re.compile(_MIN_CSS_STRING + r"|[\s;]*(\})\s*|\s*([{};,>])\s*|(:)\s+|\s+")
+
+def _tag_name(token):
+    return re.match(r"<[/!]?([A-Za-z][\w-]*)", token).group(1).lower()
+
+def minify_html(html):
+    tokens = []  # (texto, nome da tag ou None para texto)
+    pos = 0
+    for m in [*_MIN_PROTECT.finditer(html), None]:
+        end = m.start() if m else len(html)
+        for t in _MIN_TOKEN.findall(html, pos, end):
+            if t.startswith("<!--"):
+                if t.startswith("<!--[if"):
+                    tokens.append((t, "!--"))
+            elif t.startswith("<") and len(t) > 1:
+                tokens.append((_MIN_ATTR.sub(lambda a: a.group(1) or ("" if a.group(2) else " "), t),
+                               _tag_name(t)))
+            elif tokens and tokens[-1][1] is None:
+                # Texto colado ao anterior por um comentário removido: junta e colapsa de novo
+                tokens[-1] = (_MIN_SPACE.sub(" ", tokens[-1][0] + t), None)
+            else:
+                tokens.append((_MIN_SPACE.sub(" ", t), None))
+        if m:
+            tokens.append((m.group(0), m.group(1).lower()))
+            pos = m.end()
+
+    out = []
+    for i, (text, tag) in enumerate(tokens):
+        if tag is None and text == " ":
+            before = tokens[i - 1][1] if i else "html"
+            after = tokens[i + 1][1] if i + 1 < len(tokens) else "html"
+            if before in _MIN_EDGE or after in _MIN_EDGE or (before in _MIN_BLOCK and after in _MIN_BLOCK):
+                continue
+        out.append(text)
+    return "".join(out)
+
+def minify_css(css):
+    css = _MIN_CSS_COMMENT.sub(lambda m: m.group(1) or "", css)  # strings ficam como estão
+    return _MIN_CSS.sub(lambda m: next((g for g in m.groups() if g), " "), css).strip()
+
+
+class Minifier:
+    """Minifica HTML/CSS com cache em disco pelo hash do conteúdo (RenderCache em
+    .cache/minify, invalidado quando este script muda) e soma os bytes antes/depois."""
+
+    def __init__(self, cache_dir=None):
+        source = hashlib.sha256(Path(__file__).resolve().read_bytes()).hexdigest()
+        self.cache = RenderCache(cache_dir or ROOT / ".cache" / "minify", fingerprint=source)
+        self.before = self.after = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, text, kind="html"):
+        key = f"{kind}\0{text}"
+        result = self.cache.get(key)
+        if result is None:
+            result = (minify_css if kind == "css" else minify_html)(text)
+            self.cache.put(key, result)
+        before, after = len(text.encode("utf-8")), len(result.encode("utf-8"))
+        with self.lock:
+            self.before += before
+            self.after += after
+        return result
+
+    def stats(self):
+        saved = 1 - self.after / self.before if self.before else 0.0
+        return (f"Minificação: {self.before / 1024:.1f} KB -> {self.after / 1024:.1f} KB (-{saved:.1%}), "
+                f"cache: {self.cache.hits} hits, {self.cache.misses} misses")
+
+
+# KaTeX servido pelo próprio site (em vez do CDN): katex.min.css do node_modules só com
+# as fontes (woff2) das famílias que aparecem nas páginas.
+KATEX_DIST = ROOT / "node_modules" / "katex" / "dist"
+KATEX_CSS = "katex/katex.min.css"
+_KATEX_FACE = re.compile(r"@font-face\{[^{}]*\}")
+
+class KatexAssets:
+    """Famílias de fonte do KaTeX usadas por página, guardadas em .cache/katex.json para
+    que builds incrementais (que pulam páginas inalteradas) continuem sabendo quais
+    fontes publicar. note() registra uma página renderizada; keep() uma que foi pulada."""
+
+    def __init__(self, state_path=None):
+        self.state_path = state_path or ROOT / ".cache" / "katex.json"
+        try:
+            self.old = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.old = {}
+        self.pages = {}
+        self.css = (KATEX_DIST / "katex.min.css").read_text(encoding="utf-8")
+        # Regras que trocam a família: conjuntos de classes do seletor -> família
+        self.rules = [(set(re.findall(r"\.([\w-]+)", part)) - {"katex"}, family)
+                      for selectors, family in re.findall(r"([^{}]+)\{[^{}]*?font-family:\"?(KaTeX_\w+)", self.css)
+                      if not selectors.startswith("@") for part in selectors.split(",")]
+
+    def note(self, rel, html):
+        if 'class="katex' not in html:
+            return
+        classes = set(" ".join(re.findall(r'class="([^"]*)"', html)).split())
+        self.pages[rel] = sorted({"KaTeX_Main"} | {family for needed, family in self.rules if needed <= classes})
+
+    def keep(self, rel):
+        if rel in self.old:
+            self.pages[rel] = self.old[rel]
+
+    def write(self, output_dir, previous=None):
+        """Grava o CSS e as fontes usadas; retorna os caminhos relativos publicados"""
+        families = {f for fams in self.pages.values() for f in fams}
+        fonts = []
+        def face(m):
+            block = m.group(0)
+            woff2 = re.search(r'url\((fonts/[\w-]+\.woff2)\) format\("woff2"\)', block)
+            if re.search(r"font-family:\"?(KaTeX_\w+)", block).group(1) not in families or not woff2:
+                return ""
+            fonts.append(woff2.group(1))
+            return re.sub(r"src:[^;}]*", f'src:url({woff2.group(1)}) format("woff2")', block)
+        css = _KATEX_FACE.sub(face, self.css)
+
+        out = output_dir / KATEX_CSS
+        _write_output(out, css.encode("utf-8"), previous / KATEX_CSS if previous else None)
+        for font in fonts:  # cópia (ou hardlink da release publicada), nunca do node_modules
+            _write_output(out.parent / font, (KATEX_DIST / font).read_bytes(),
+                          (previous / KATEX_CSS).parent / font if previous else None)
+        for stale in (out.parent / "fonts").glob("*"):
+            if f"fonts/{stale.name}" not in fonts:
+                stale.unlink()
+        return [KATEX_CSS, *(str(PurePosixPath(KATEX_CSS).parent / font) for font in fonts)]
+
+    def save(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path.write_text(json.dumps(self.pages, sort_keys=True), encoding="utf-8")
+
+COMPRESS_EXTS = {".html", ".css", ".js", ".svg", ".json"}
+
+def _compress_file(path, digest, brotli):
+    data = path.read_bytes()
+    gz = gzip.compress(data, compresslevel=9, mtime=0)  # mtime=0: bytes estáveis entre builds
+    _write_atomic(path.with_name(path.name + ".gz"), gz)
+    sizes = [len(data), len(gz), None]
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        _write_atomic(path.with_name(path.name + ".br"), br)
+        sizes[2] = len(br)
+    return [digest, *sizes]
+
+def _write_atomic(path, data):
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def precompress(output_dir, jobs=None, min_size=1024, state_path=None, previous=None):
+    """Gera irmãos .gz (e .br, se o módulo brotli estiver instalado) para gzip_static/brotli_static.
+
+    Comprime HTML/CSS/JS/SVG acima de min_size bytes num pool de threads (zlib e brotli
+    liberam o GIL). Arquivos cujo hash não mudou desde a última compressão, registrada em
+    .cache/compress.json, são pulados; irmãos de arquivos que sumiram são removidos.
+    previous: release publicada, de onde irmãos de arquivos idênticos (hardlinks) são reaproveitados.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    state_path = Path(state_path) if state_path else ROOT / ".cache" / "compress.json"
+    try:
+        old = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        old = {}
+
+    state, todo = {}, []
+    for path in output_dir.rglob("*"):
+        if path.suffix not in COMPRESS_EXTS or ".git" in path.relative_to(output_dir).parts or not path.is_file():
+            continue
+        if path.stat().st_size < min_size:
+            continue
+        rel = path.relative_to(output_dir).as_posix()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        prev = old.get(rel)
+        if prev and prev[0] == digest and previous is not None and (previous / rel).exists() \
+                and os.path.samefile(previous / rel, path):
+            for ext in (".gz", ".br"):
+                src, sibling = previous / (rel + ext), path.with_name(path.name + ext)
+                if src.exists() and not sibling.exists():
+                    _link_or_copy(src, sibling)
+        if (prev and prev[0] == digest and path.with_name(path.name + ".gz").exists()
+                and (prev[3] is not None) == (brotli is not None)
+                and (brotli is None or path.with_name(path.name + ".br").exists())):
+            state[rel] = prev
+        else:
+            todo.append((rel, path, digest))
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        for (rel, _, _), entry in zip(todo, executor.map(lambda t: _compress_file(t[1], t[2], brotli), todo)):
+            state[rel] = entry
+
+    # Irmãos de arquivos apagados ou que ficaram abaixo do limite
+    for rel in set(old) - set(state):
+        for ext in (".gz", ".br"):
+            (output_dir / (rel + ext)).unlink(missing_ok=True)
+    if brotli is None:
+        for rel in state:
+            (output_dir / (rel + ".br")).unlink(missing_ok=True)
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state), encoding="utf-8")
+
+    original = sum(e[1] for e in state.values())
+    saved_gz = original - sum(e[2] for e in state.values())
+    msg = f"Compressão: {len(todo)} arquivos comprimidos, {len(state) - len(todo)} reaproveitados; gzip economiza {saved_gz / 1024:.1f} KB"
+    if brotli is not None:
+        msg += f", brotli {(original - sum(e[3] for e in state.values())) / 1024:.1f} KB"
+    print(msg + f" de {original / 1024:.1f} KB")
+
+KEEP_RELEASES = 3
+PRESERVED = [".git", "CNAME"]  # arquivos do deploy que não são gerados pelo build
+
+def _link_or_copy(src, dest):
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)  # outro filesystem/sem suporte a hardlinks
+
+def _same_bytes(path, data):
+    try:
+        return path.stat().st_size == len(data) and path.read_bytes() == data
+    except OSError:
+        return False
+
+def _write_output(path, data, previous=None):
+    """Grava uma saída sem reescrever o inode existente (releases compartilham arquivos por
+    hardlink); se previous, a mesma saída na release publicada, tem os mesmos bytes, path
+    vira um hardlink dela. Sem previous (watch), uma saída já com os mesmos bytes fica intacta."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if previous is None or not _same_bytes(previous, data):
+        if not _same_bytes(path, data):
+            _write_atomic(path, data)
+    elif not (path.exists() and os.path.samefile(previous, path)):
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.unlink(missing_ok=True)
+        _link_or_copy(previous, tmp)
+        os.replace(tmp, path)
+
+
+class Releases:
+    """Publicação atômica: cada build é montado em .releases/<id>.staging, validado e só
+    então ativado, trocando o symlink public -> .releases/<id> com um rename atômico.
+
+    A release nova começa vazia (build completo) ou como cópia por hardlinks da atual
+    (incremental); saídas iguais às publicadas viram hardlinks, então cada publicação
+    ocupa só o que mudou. .git e CNAME passam para a release ativa e as `keep` mais
+    recentes ficam para rollback. Sem symlinks (ex. Windows sem modo desenvolvedor),
+    public/ é um diretório e a troca usa duas renomeações; .releases/.atual guarda o id.
+
+    O estado do build (manifesto, compressão, fontes do KaTeX) descreve os arquivos de
+    uma release, então fica em .cache/releases/<id>: a release nova parte de uma cópia
+    do estado da atual e um rollback volta junto com ela.
+    """
+
+    def __init__(self, public, keep=KEEP_RELEASES):
+        self.public, self.keep = public, keep
+        self.dir = public.with_name(".releases")
+        self.marker = self.dir / ".atual"
+        self.state_root = public.parent / ".cache" / "releases"
+
+    @property
+    def current(self):
+        """Diretório servido hoje, ou None antes da primeira publicação"""
+        if self.public.is_symlink():
+            return self.public.resolve() if self.public.exists() else None
+        return self.public if self.public.is_dir() else None
+
+    def current_id(self):
+        if self.public.is_symlink():
+            return os.path.basename(os.readlink(self.public))
+        try:
+            return self.marker.read_text(encoding="utf-8").strip() or None
+        except OSError:
+            return None
+
+    def state_dir(self, release_id=None):
+        """Estado do build da release (padrão: a publicada; public/ real sem id = 0-anterior)"""
+        return self.state_root / (release_id or self.current_id() or "0-anterior")
+
+    def discard(self, staging):
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(self.state_dir(staging.name.removesuffix(".staging")), ignore_errors=True)
+
+    def history(self):
+        """Ids das releases completas (inclusive a ativa), da mais antiga para a mais nova"""
+        ids = {p.name for p in self.dir.iterdir() if p.is_dir() and not p.name.endswith(".staging")} if self.dir.exists() else set()
+        return sorted(ids | ({self.current_id()} - {None}))
+
+    def stage(self, clone=False):
+        self.dir.mkdir(exist_ok=True)
+        for leftover in self.dir.glob("*.staging"):  # builds que falharam
+            self.discard(leftover)
+        staging = self.dir / f"{datetime.now():%Y%m%d-%H%M%S-%f}.staging"
+        if clone and self.current is not None:
+            shutil.copytree(self.current, staging, copy_function=_link_or_copy, ignore=shutil.ignore_patterns(".git"))
+        else:
+            staging.mkdir()
+        if self.state_dir().is_dir():
+            shutil.copytree(self.state_dir(), self.state_dir(staging.name.removesuffix(".staging")))
+        return staging
+
+    def validate(self, staging, expected):
+        missing = sorted(rel for rel in expected if not (staging / rel).is_file())
+        if missing:
+            self.discard(staging)
+            raise RuntimeError(f"Release incompleta ({len(missing)} saídas ausentes: {', '.join(missing[:5])}"
+                               f"{' ...' if len(missing) > 5 else ''}); public/ não foi alterado")
+
+    def publish(self, staging):
+        """Ativa a release montada em staging e apaga as antigas além de keep"""
+        release = staging.with_name(staging.name.removesuffix(".staging"))
+        os.replace(staging, release)
+        self.activate(release)
+        self.prune()
+        return release
+
+    def activate(self, release):
+        link = self.public.with_name(".public.tmp")
+        if link.is_symlink():
+            link.unlink()
+        try:
+            os.symlink(os.path.relpath(release, self.public.parent), link, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            link = None
+
+        current, current_id = self.current, self.current_id()
+        if current is not None:
+            for name in PRESERVED:
+                src, dest = current / name, release / name
+                if name == ".git" and src.exists():
+                    shutil.rmtree(dest, ignore_errors=True)
+                    os.replace(src, dest)
+                elif src.is_file() and not dest.exists():
+                    _link_or_copy(src, dest)
+
+        if self.public.is_dir() and not self.public.is_symlink():
+            # public/ real (1ª publicação ou sem symlinks) vira uma release comum
+            os.replace(self.public, self.dir / (current_id or "0-anterior"))
+        if link is not None:
+            os.replace(link, self.public)  # troca atômica do symlink
+            self.marker.unlink(missing_ok=True)
+        else:
+            if self.public.is_symlink():
+                self.public.unlink()
+            os.replace(release, self.public)
+            self.marker.write_text(release.name, encoding="utf-8")
+
+    def rollback(self):
+        """Volta public/ para a release anterior à ativa; retorna o id ativado"""
+        ids, current = self.history(), self.current_id()
+        older = ids[:ids.index(current)] if current in ids else []
+        if not older:
+            raise RuntimeError("Nenhuma release anterior para restaurar")
+        self.activate(self.dir / older[-1])
+        return older[-1]
+
+    def prune(self):
+        current = self.current_id()
+        for old in self.history()[:-self.keep or None]:
+            if old != current:
+                shutil.rmtree(self.dir / old, ignore_errors=True)
+        if self.state_root.exists():
+            kept = set(self.history())
+            for state in self.state_root.iterdir():
+                if state.name not in kept:
+                    shutil.rmtree(state, ignore_errors=True)
+
+    def stats(self, release):
+        """(arquivos só desta release, bytes deles, arquivos compartilhados por hardlink)"""
+        own = size = shared = 0
+        for path in release.rglob("*"):
+            if ".git" in path.relative_to(release).parts or not path.is_file():
+                continue
+            st = path.stat()
+            if st.st_nlink > 1:
+                shared += 1
+            else:
+                own, size = own + 1, size + st.st_size
+        return own, size, shared
+
+ARTICLE_DIRS = ["articles", "series"]
+
+def content_files():
+    """(caminho, is_article) de cada .md de content/, exceto _index.md"""
+    for name in ARTICLE_DIRS:
+        dir_path = ROOT / "content" / name
+        if dir_path.exists():
+            yield from ((f, True) for f in dir_path.rglob("*.md"))
+    for filepath in (ROOT / "content").glob("*.md"):
+        if filepath.name != "_index.md":
+            yield filepath, False
+
+def content_kind(path):
+    """is_article de um caminho que content_files() listaria, ou None se ele não é uma página"""
+    content = ROOT / "content"
+    if path.suffix != ".md" or path == content / "_index.md":
+        return None
+    if path.parent == content:
+        return False
+    return True if any(path.is_relative_to(content / name) for name in ARTICLE_DIRS) else None
+
+def build_site(pool=None, cache=None, incremental=False, changed=None, jobs=None, fingerprint_assets=False,
+               compress=False, page_size=PAGE_SIZE, routes=None, pages=None, stage=True, keep_releases=KEEP_RELEASES,
+               minify=False):
+    """Gera site estático (pool: NodeRenderPool reaproveitado, ex. no modo watch)
+
+    O build é montado numa release nova (Releases) e só substitui public/ depois de
+    completo; stage=False grava direto na release publicada (modo watch), sempre com
+    escritas atômicas. keep_releases: releases antigas mantidas para rollback.
+
+    incremental=True parte da release publicada e reescreve apenas as saídas cujas
+    dependências mudaram desde o último build, removendo as saídas órfãs. changed (caminhos
+    alterados, vindo do watcher) permite pular etapas: mudanças só em static/ ou
+    images/ apenas ressincronizam os assets. jobs: páginas renderizadas em paralelo
+    (padrão: número de CPUs). fingerprint_assets: nomes de assets com hash do conteúdo.
+    compress: gera .gz/.br ao lado das saídas (precompress). page_size: artigos por
+    página nas listas de artigos/categorias/séries (0 = lista única). minify: HTML e
+    CSS minificados (Minifier).
+
+    routes: em vez de gravar public/, preenche o dict com {caminho relativo: render()}
+    sem renderizar nada (servidor de desenvolvimento); os corpos só são lidos quando
+    render() é chamado. pages: metadados já carregados, pulando a 1ª passada.
+    """
     output_dir = ROOT / "public"
-    
-    # Limpa output mantendo .git e CNAME
-    if output_dir.exists():
-        (output_dir / "index.html").write_text(
-            "<!DOCTYPE html><html><head><meta charset='utf-8'><meta http-equiv='refresh' content='1'></head>"
-            "<body><p>Gerando site...</p></body></html>", encoding="utf-8")
-        
-        for item in output_dir.iterdir():
-            if item.name not in [".git", "CNAME", "index.html"]:
-                try:
-                    (shutil.rmtree if item.is_dir() else item.unlink)(item)
-                except Exception as e:
-                    print(f"Aviso: não foi possível remover {item}: {e}")
-    output_dir.mkdir(exist_ok=True)
+    if (incremental and changed and output_dir.exists() and not fingerprint_assets
+            and all(_touches_assets([p]) for p in changed)):
+        PROFILER.phase("assets")
+        _report_assets(AssetPipeline(output_dir, state_path=Releases(output_dir).state_dir() / "assets.json",
+                                     minify=Minifier() if minify else None).sync())
+        if compress:
+            PROFILER.phase("compressão")
+            precompress(output_dir, jobs, state_path=Releases(output_dir).state_dir() / "compress.json")
+        PROFILER.phase()
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    if pool is None and routes is None:
+        with NodeRenderPool(size=jobs) as pool:
+            return build_site(pool, cache, incremental, changed, jobs, fingerprint_assets, compress, page_size,
+                              stage=stage, keep_releases=keep_releases, minify=minify)
+    if cache is None:
+        cache = RenderCache()
+
+    # Nova release ao lado de public/ (a publicada continua intacta até a troca)
+    PROFILER.phase("preparar release")
+    releases = Releases(output_dir, keep_releases) if stage and routes is None else None
+    previous = releases.current if releases else None
+    if releases:
+        output_dir = releases.stage(clone=incremental)
+        state_dir = releases.state_dir(output_dir.name.removesuffix(".staging"))
+    elif routes is None:
+        output_dir.mkdir(exist_ok=True)
+        state_dir = Releases(output_dir).state_dir()
     
     # Configuração
+    PROFILER.phase("configuração")
     env = Environment(loader=FileSystemLoader(str(ROOT / "layouts")))
     env.filters['normalize'] = normalize
+    minifier = Minifier() if minify and routes is None else None
+    assets = AssetPipeline(output_dir, fingerprint_assets, previous, state_dir / "assets.json",
+                           minify=minifier) if routes is None else None
+    katex = KatexAssets(state_dir / "katex.json") if routes is None else None
+    env.globals['asset'] = assets.url if assets else lambda path: path
     shortcodes = load_shortcodes()
 
-    # Carrega conteúdo
-    pages = []
-    for dir_path in [ROOT / "content" / "articles", ROOT / "content" / "series"]:
-        if dir_path.exists():
-            pages.extend(load_content_file(f, True) for f in dir_path.rglob("*.md"))
+    # Dependências: hashes de arquivos, templates (com os que eles estendem) e shortcodes
+    file_hashes = {}
+    def file_hash(path):
+        if path not in file_hashes:
+            file_hashes[path] = hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else ""
+        return file_hashes[path]
 
-    for filepath in (ROOT / "content").glob("*.md"):
-        if filepath.name != "_index.md":
-            pages.append(load_content_file(filepath, False))
+    def template_deps(name):
+        if routes is not None:
+            return []  # sem manifesto, as chaves de dependência não são usadas
+        source = env.loader.get_source(env, name)[0]
+        refs = meta.find_referenced_templates(env.parse(source))
+        return [file_hash(ROOT / "layouts" / name)] + [d for ref in refs if ref for d in template_deps(ref)]
+
+    def shortcode_deps(names):
+        deps = []
+        for name in names:
+            if name in shortcodes:
+                mod = ROOT / "layouts" / "shortcodes" / f"{name}.py"
+                # Shortcodes voláteis (ex. lifegrid, que depende da data atual) sempre regeram
+                deps += [name, file_hash(mod), str(time.time()) if getattr(shortcodes[name], "volatile", False) else ""]
+        return deps
+
+    # Sem manifesto (routes), as chaves não são usadas: pula o hash O(páginas) dos metadados
+    digest = list_digest if routes is None else lambda items: ""
+    if routes is None:
+        manifest = BuildManifest(hashlib.sha256((cache.fingerprint + file_hash(Path(__file__).resolve())
+                                                 + ("minify" if minify else "")).encode()).hexdigest(),
+                                 state_dir / "manifest.json")
+
+    def emit(rel, deps, render):
+        """Grava public/<rel> com render() se as dependências mudaram"""
+        if routes is not None:
+            routes[rel] = render
+            return
+        key = hashlib.sha256("\0".join(map(str, [*deps, assets.digest()])).encode("utf-8")).hexdigest()
+        manifest.record(rel, key)
+        if incremental and manifest.is_fresh(rel, key, output_dir):
+            katex.keep(rel)
+            manifest.count(written=False)
+            return
+        html = assets.rewrite(render())
+        if rel.endswith(".html"):
+            katex.note(rel, html)
+            if minifier:
+                with span("minificação"):
+                    html = minifier(html)
+        with span("escrita"):
+            _write_output(output_dir / rel, html.encode("utf-8"), previous / rel if previous else None)
+        manifest.count(written=True)
+
+    page_deps = template_deps("page.html")
+    search = SearchIndex(state_dir / "search.json", manifest.build_key) if routes is None else SearchIndex()
+    sources = SourceCache() if routes is None else None
+
+    # Carrega conteúdo (1ª passada: só metadados)
+    PROFILER.phase("carregar conteúdo")
+    def load(filepath, is_article):
+        with PROFILER.page(str(filepath.relative_to(ROOT / "content"))):
+            return load_content_file(filepath, is_article)
+
+    if pages is None:
+        pages = [load(f, is_article) for f, is_article in content_files()]
 
     # Processa index
     index_file = ROOT / "content" / "_index.md"
@@ -205,134 +1741,661 @@ def build_site():
     
     # Organiza conteúdo
     pages.sort(key=lambda x: x["timestamp"], reverse=True)
-    articles = [p for p in pages if p["is_article"]]
+    site = SiteIndex(pages)
+    articles, all_categories = site.articles, site.categories
     pages_avulsas = [p for p in pages if not p["is_article"]]
-    all_categories = sorted(set(cat for p in articles for cat in p["categories"]))
-    
-    # Renderiza páginas individuais
-    for page in pages:
-        page["content"] = render_markdown(process_shortcodes(page["raw_content"], shortcodes, all_categories, pages))
-        del page["raw_content"]
-        output_path = output_dir / page["output"] / "index.html"
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(env.get_template("page.html").render(**page), encoding="utf-8")
+
+    # Watch: se só corpos mudaram (digest de listas das páginas alteradas igual ao do build
+    # anterior), listas e taxonomias mantêm os registros do manifesto sem recalcular nada
+    lists_fresh = False
+    if routes is None:
+        old_meta = manifest.old_meta
+        if (incremental and changed and old_meta.get("page_size") == page_size
+                and all(content_kind(p) is not None for p in changed)
+                and not any(getattr(shortcodes.get(name), "volatile", False) for name in LIST_SHORTCODES)):
+            old_pages = old_meta["pages"]
+            lists_fresh = (len(old_pages) == len(pages) and all(p["output"] in old_pages for p in pages)
+                           and all(digest([p]) == old_pages[p["output"]] for p in pages if p["source"] in changed))
+        if lists_fresh:
+            manifest.meta = old_meta
+        else:
+            manifest.meta = {"site": digest(pages), "page_size": page_size,
+                             "pages": {p["output"]: digest([p]) for p in pages}}
+        site_digest = manifest.meta["site"]
+    else:
+        site_digest = ""
+
+    def content_deps(names):
+        return shortcode_deps(names) + ([site_digest, all_categories] if names else [])
+
+    def emit_list_page(rel, deps, render):
+        """emit() de listas e taxonomias: deps() só é calculado se os metadados mudaram"""
+        if lists_fresh and manifest.carry(rel, output_dir):
+            katex.keep(rel)
+            manifest.count(written=False)
+            return
+        with PROFILER.page(rel):
+            emit(rel, deps(), render)
+
+    # Renderiza páginas individuais (em paralelo: markdown no pool Node, template e escrita nas threads)
+    PROFILER.phase("páginas")
+    # 2ª passada: cada corpo é lido, expandido, renderizado e gravado, e então descartado;
+    # só os metadados da 1ª passada ficam em memória durante o build.
+    def render_page(page, body):
+        with span("shortcodes"):
+            md = process_shortcodes(body, shortcodes, site)
+        with span("markdown"):
+            content = render_markdown(md, pool, cache)
+        with span("template"):
+            return env.get_template("page.html").render(**page, content=content)
+
+    def render_list(title, name, view, **extra):
+        """Página de listagem (shortcode name sobre view), com os spans de render_page"""
+        with span("shortcodes"):
+            content = shortcodes[name](view)
+        with span("template"):
+            return env.get_template("page.html").render(title=title, content=content, is_article=False, **extra)
+
+    def read_body(page):
+        with span("leitura"):
+            return split_frontmatter(page["source"].read_text(encoding="utf-8"))[1]
+
+    def build_page(page):
+        if routes is not None:
+            routes[f"{page['output']}/index.html"] = lambda: render_page(page, read_body(page))
+            return
+        try:
+            with PROFILER.page(str(page["source"].relative_to(ROOT / "content"))):
+                # Fonte com stat inalterado não é relido (SourceCache), nem tokenizado (reuse)
+                source_hash, names, body = sources.info(page["source"])
+                if not search.reuse(page, source_hash):
+                    body = body if body is not None else read_body(page)
+                    with span("busca"):
+                        search.add(page, body, source_hash)
+                emit(f"{page['output']}/index.html", [source_hash, *page_deps, *content_deps(names)],
+                     lambda: render_page(page, body if body is not None else read_body(page)))
+        except Exception as e:
+            raise RuntimeError(f"Erro ao gerar {page['source'].relative_to(ROOT)}: {e}") from e
+
+    if jobs == 1 or routes is not None:
+        for page in pages:
+            build_page(page)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            # list() propaga a primeira exceção (com o caminho do arquivo) como no build serial
+            list(executor.map(build_page, pages))
     
     # Homepage
-    (output_dir / "index.html").write_text(
-        env.get_template("page.html").render(
-            title=str(fm.get("title") or "Página Inicial"),
-            content=render_markdown(process_shortcodes(md, shortcodes, all_categories, pages)),
-            is_article=False,
-            is_homepage=True,
-        ), encoding="utf-8"
-    )
+    PROFILER.phase("homepage, listas e taxonomias")
+    with PROFILER.page("_index.md"):
+        emit("index.html", [file_hash(index_file), *page_deps, *content_deps(used_shortcodes(md))], lambda:
+            render_page({"title": str(fm.get("title") or "Página Inicial"), "is_article": False, "is_homepage": True}, md))
     
+    # Listas de artigos paginadas a partir do mais antigo: /<base>/page/1 guarda os
+    # page_size primeiros posts e nunca muda; a página inicial /<base> fica com os
+    # page_size..2*page_size-1 mais recentes (nunca uma página quase vazia). Um post novo
+    # só altera a página inicial (e, quando ela chega a 2*page_size, separa uma página de
+    # arquivo e atualiza o link da anterior).
+    def emit_list(base, title, posts, categories=(), **extra):
+        ordered = site.view(posts).articles_by_date[::-1]
+        size = page_size or len(ordered) or 1
+        archived = max(0, len(ordered) // size - 1)
+        url = lambda k: f"/{base}" if k > archived else f"/{base}/page/{k}"
+        for k in range(1, archived + 2):
+            chunk = ordered[(k - 1) * size:k * size] if k <= archived else ordered[archived * size:]
+            pagination = {"newer": url(k + 1) if k <= archived else None,
+                          "older": url(k - 1) if k > 1 else None} if archived else None
+            page_title = title if k > archived else f"{title} (página {k})"
+            rel = f"{url(k).lstrip('/')}/index.html"
+            emit_list_page(rel, lambda chunk=chunk, page_title=page_title, pagination=pagination:
+                           [page_title, *page_deps, *shortcode_deps(["artlist"]), digest(chunk), pagination, extra],
+                 lambda chunk=chunk, page_title=page_title, pagination=pagination: render_list(
+                page_title, "artlist", site.view(chunk[::-1], categories), pagination=pagination, **extra))
+
+    if "artlist" in shortcodes:
+        emit_list("artigos", "Artigos", articles)
+
     # Páginas especiais
     for shortcode_name, data, title, path in [
         ("pagelist", pages_avulsas, "Páginas", "paginas"),
-        ("artlist", articles, "Artigos", "artigos"),
-        ("serieslist", articles, "Séries", "series")
+        ("serieslist", articles, "Séries", "series"),
+        ("search", [], "Busca", "busca")
     ]:
         if shortcode_name in shortcodes:
-            p = output_dir / path / "index.html"
-            p.parent.mkdir(parents=True, exist_ok=True)
-            p.write_text(env.get_template("page.html").render(
-                title=title, content=shortcodes[shortcode_name]([], data), is_article=False
-            ), encoding="utf-8")
+            emit_list_page(f"{path}/index.html", lambda shortcode_name=shortcode_name, data=data, title=title:
+                           [title, *page_deps, *shortcode_deps([shortcode_name]), digest(data)],
+                 lambda shortcode_name=shortcode_name, data=data, title=title: render_list(
+                title, shortcode_name, site.view(data)))
     
     # Categorias
     if all_categories and "category" in shortcodes:
-        path = output_dir / "categorias" / "index.html"
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(env.get_template("page.html").render(
-            title="Categorias", content=shortcodes["category"](all_categories, articles), is_article=False
-        ), encoding="utf-8")
+        emit_list_page("categorias/index.html", lambda: [*page_deps, *shortcode_deps(["category"]), digest(all_categories)],
+             lambda: render_list("Categorias", "category", site.view(articles, all_categories)))
         
         if "artlist" in shortcodes:
-            for cat in all_categories:
-                cat_posts = [p for p in articles if cat in p["categories"]]
+            for cat, cat_posts in site.by_category.items():
                 if cat_posts:
-                    p = output_dir / "categorias" / normalize(cat) / "index.html"
-                    p.parent.mkdir(parents=True, exist_ok=True)
-                    p.write_text(env.get_template("page.html").render(
-                        title=cat, content=shortcodes["artlist"]([cat], cat_posts),
-                        is_article=False, category_id=f"tag_{normalize(cat)}"
-                    ), encoding="utf-8")
+                    emit_list(f"categorias/{site.slug(cat)}", cat, cat_posts, [cat],
+                              category_id=f"tag_{site.slug(cat)}")
     
     # Séries
-    series_list = sorted(set(p["series"] for p in articles if p["series"]))
-    if series_list and "artlist" in shortcodes:
-        for serie in series_list:
-            posts = sorted([p for p in articles if p["series"] == serie], 
-                         key=lambda x: (x["part"], x["timestamp"]))
+    if site.series and "artlist" in shortcodes:
+        for serie, posts in site.by_series.items():
             if posts:
-                p = output_dir / "series" / normalize(serie) / "index.html"
-                p.parent.mkdir(parents=True, exist_ok=True)
-                p.write_text(env.get_template("page.html").render(
-                    title=serie, content=shortcodes["artlist"]([], posts), is_article=False
-                ), encoding="utf-8")
+                emit_list(f"series/{site.slug(serie)}", serie, posts)
     
     # 404 e assets
-    (output_dir / "404.html").write_text(env.get_template("404.html").render(), encoding="utf-8")
-    
-    for name in ["static", "images"]:
-        src = ROOT / name
-        if src.exists():
-            dest = output_dir / name
-            if dest.exists():
-                shutil.rmtree(dest)
-            shutil.copytree(src, dest)
+    emit("404.html", template_deps("404.html"), lambda: env.get_template("404.html").render())
+    if routes is not None:
+        return  # o servidor monta o índice de busca sob demanda (DevServer.search_files)
+
+    # Índice de busca (só os shards com bytes novos são regravados no build incremental)
+    PROFILER.phase("índice de busca")
+    start = time.perf_counter()
+    search_files = search.files()
+    for rel, data in search_files.items():
+        emit(rel, [hashlib.sha256(data.encode("utf-8")).hexdigest()], lambda data=data: data)
+    search_size = sum(len(data.encode("utf-8")) for data in search_files.values())
+    print(f"Índice de busca: {len(search.docs)} documentos, {len(search_files) - 1} arquivos, "
+          f"{search_size / 1024:.1f} KB em {search.seconds + time.perf_counter() - start:.2f}s")
+
+    PROFILER.phase("assets")
+    if changed is None or _touches_assets(changed) or fingerprint_assets:
+        _report_assets(assets.sync())
+    katex_files = katex.write(output_dir, previous)
+
+    # Remove saídas que não existem mais (ex. artigo apagado ou renomeado)
+    PROFILER.phase("órfãos e manifesto")
+    for rel in manifest.orphans():
+        path = output_dir / rel
+        path.unlink(missing_ok=True)
+        for parent in path.parents:
+            if parent == output_dir or not parent.is_dir() or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+    if compress:
+        PROFILER.phase("compressão")
+        precompress(output_dir, jobs, state_path=state_dir / "compress.json", previous=previous)
+
+    if releases:
+        PROFILER.phase("publicação")
+        releases.validate(output_dir, [*manifest.outputs, *katex_files,
+                                       *(assets.url(f"/{rel}").lstrip("/") for rel in assets.files)])
+        release = releases.publish(output_dir)
+        own, size, shared = releases.stats(releases.current)
+        print(f"Release {release.name} publicada: {own} arquivos novos ({size / 1024:.1f} KB), "
+              f"{shared} compartilhados por hardlink")
+    manifest.save()
+    katex.save()
+    search.save()
+    sources.save()
+
+    PROFILER.phase("limpeza do cache")
+    cache.prune()
+    if minifier:
+        minifier.cache.prune()
+    PROFILER.phase()
+    print(cache.stats())
+    if minifier:
+        print(minifier.stats())
+    if incremental:
+        print(f"Build incremental: {manifest.written} saídas geradas, {manifest.skipped} inalteradas, "
+              f"{len(manifest.orphans())} removidas")
 
 # =============================================================================
 # WATCH MODE
 # =============================================================================
 
-def get_files_hash():
-    """Calcula hash de todos os arquivos relevantes (inclui gfm.js e este script para o watch)."""
-    hash_md5 = hashlib.md5()
-    for directory in ["content", "layouts", "static", "images"]:
-        dir_path = ROOT / directory
-        if not dir_path.exists():
-            continue
-        for filepath in dir_path.rglob("*"):
-            if filepath.is_file() and not any(x in str(filepath) for x in ['__pycache__', '.pyc', 'public']):
-                try:
-                    hash_md5.update(str(filepath).encode() + filepath.read_bytes())
-                except (PermissionError, OSError) as e:
-                    print(f"Aviso: não foi possível ler {filepath}: {e}")
-    for single in [ROOT / "gfm.js", ROOT / "blog_generator.py"]:
-        if single.exists():
+WATCH_DIRS = ["content", "layouts", "static", "images"]
+WATCH_FILES = ["gfm.js", "blog_generator.py"]
+
+# Temporários de editores e ferramentas: sed -i (sedXXXXXX), sonda de escrita do vim (4913),
+# "safe write" do JetBrains (___jb_tmp___/___jb_old___), swap do vim e lock do emacs
+_EDITOR_TEMP = re.compile(r"sed[A-Za-z0-9]{6}|4913|.*___jb_(?:tmp|old)___|.*\.sw[a-p]|\.#.*")
+
+def _ignored(path):
+    name = path.name
+    if path.is_relative_to(ROOT / "content") and path.suffix != ".md" and path != ROOT / "content":
+        return True  # o build só lê .md de content/ (diretórios removidos expandem antes, em refresh)
+    return ("__pycache__" in path.parts or name.endswith((".pyc", "~", ".tmp"))
+            or _EDITOR_TEMP.fullmatch(name) is not None)
+
+
+class StatIndex:
+    """Índice (mtime, tamanho) dos arquivos observados; só faz stat, nunca lê conteúdo."""
+
+    def __init__(self):
+        self.entries = {}
+        self.refresh(list(self.walk()))
+
+    @staticmethod
+    def walk():
+        for directory in WATCH_DIRS:
+            dir_path = ROOT / directory
+            if dir_path.exists():
+                yield from (f for f in dir_path.rglob("*") if not f.is_dir())
+        yield from (ROOT / name for name in WATCH_FILES)
+
+    def refresh(self, paths):
+        """Atualiza o índice para os caminhos dados e retorna os que mudaram"""
+        changed, paths = set(), list(paths)
+        for path in paths:
+            if path not in self.entries and not path.exists():
+                # Diretório removido/movido: entradas que estavam dentro dele
+                paths.extend(p for p in self.entries if p.is_relative_to(path) and p != path)
+            if _ignored(path):
+                continue
             try:
-                hash_md5.update(str(single).encode() + single.read_bytes())
-            except (PermissionError, OSError) as e:
-                print(f"Aviso: não foi possível ler {single}: {e}")
-    return hash_md5.hexdigest()
+                st = path.stat()
+                sig = None if stat.S_ISDIR(st.st_mode) else (st.st_mtime_ns, st.st_size)
+            except OSError:
+                sig = None
+            if sig is None:
+                if self.entries.pop(path, None) is not None:
+                    changed.add(path)
+            elif self.entries.get(path) != sig:
+                self.entries[path] = sig
+                changed.add(path)
+        return changed
+
+    def rescan(self):
+        return self.refresh(list(self.walk()) + list(self.entries))
+
+
+class _Inotify:
+    """inotify via ctypes (Linux); observa recursivamente os diretórios de WATCH_DIRS."""
+
+    MASK = 0x2 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800  # MODIFY, CLOSE_WRITE, MOVED_*, CREATE, DELETE*, MOVE_SELF
+    IN_ISDIR, IN_Q_OVERFLOW = 0x40000000, 0x4000
+
+    def __init__(self):
+        import ctypes, ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self.dirs = {}
+        self.add(ROOT, recursive=False)
+        for directory in WATCH_DIRS:
+            if (ROOT / directory).exists():
+                self.add(ROOT / directory)
+
+    def add(self, path, recursive=True):
+        for d in [path, *(p for p in path.rglob("*") if p.is_dir())] if recursive else [path]:
+            if "__pycache__" in d.parts:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d), self.MASK)
+            if wd >= 0:
+                self.dirs[wd] = d
+
+    def read(self, timeout):
+        """Eventos disponíveis em até timeout segundos: lista de caminhos (None = overflow)"""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        data, paths, i = os.read(self.fd, 64 * 1024), [], 0
+        while i < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, i)
+            name = data[i + 16:i + 16 + length].rstrip(b"\0")
+            i += 16 + length
+            if mask & self.IN_Q_OVERFLOW:
+                return [None]
+            base = self.dirs.get(wd)
+            if base is None or not name:
+                continue
+            path = base / os.fsdecode(name)
+            if base == ROOT and path.name not in WATCH_FILES and path.name not in WATCH_DIRS:
+                continue
+            if mask & self.IN_ISDIR:
+                if path.exists():
+                    self.add(path)
+                    paths.extend(path.rglob("*"))
+            paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Espera mudanças em content/, layouts/, static/, images/, gfm.js e no próprio script.
+
+    Usa inotify quando disponível e, senão, polling do StatIndex (apenas stat, sem
+    ler arquivos). Rajadas de eventos (editores salvam em vários passos) são agrupadas
+    até `debounce` segundos sem novidades; wait() retorna o conjunto de caminhos alterados.
+    """
+
+    def __init__(self, debounce=0.1, interval=0.5):
+        self.debounce, self.interval = debounce, interval
+        self.index = StatIndex()
+        try:
+            self.inotify = _Inotify() if sys.platform.startswith("linux") else None
+        except (OSError, AttributeError):
+            self.inotify = None
+        self.mode = "inotify" if self.inotify else "polling"
+
+    def _poll(self, timeout):
+        if self.inotify is None:
+            time.sleep(timeout)
+            return self.index.rescan()
+        events = self.inotify.read(timeout)
+        if None in events:  # fila do kernel estourou: recorre a uma varredura completa
+            return self.index.rescan()
+        return self.index.refresh(events)
+
+    def wait(self):
+        changed = set()
+        while not changed:
+            changed = self._poll(self.interval if self.inotify is None else None)
+        while True:
+            more = self._poll(self.debounce)
+            if not more:
+                return changed
+            changed |= more
+
+    def close(self):
+        if self.inotify:
+            self.inotify.close()
+
+# =============================================================================
+# SERVIDOR DE DESENVOLVIMENTO
+# =============================================================================
+
+# Injetado antes de </body>: recarrega só se a URL aberta estiver entre as invalidadas
+LIVE_RELOAD = """<script>
+new EventSource("/__livereload").onmessage = e => {
+  const urls = JSON.parse(e.data), path = location.pathname.replace(/\\/(index\\.html)?$/, "") || "/";
+  if (urls.includes("*") || urls.includes(path)) location.reload();
+};
+</script>"""
+
+def _rel_url(rel):
+    return "/" + rel.removesuffix("index.html").rstrip("/") if rel.endswith("index.html") else f"/{rel}"
+
+
+class DevServer:
+    """Renderiza cada URL sob demanda, a partir dos metadados em memória.
+
+    Metadados, Environment do Jinja e shortcodes são carregados uma vez (build_site com
+    routes, sem ler corpos); a página é renderizada no primeiro pedido e fica num cache
+    por URL. update() recebe os caminhos do FileWatcher: editar só o corpo de um artigo
+    invalida uma URL; mudar metadados, templates ou shortcodes remonta as rotas em
+    memória. Os navegadores são avisados por SSE (/__livereload).
+    """
+
+    def __init__(self, pool, page_size=PAGE_SIZE):
+        self.pool, self.page_size = pool, page_size
+        self.render_cache = RenderCache()
+        self.pages = {path: load_content_file(path, is_article) for path, is_article in content_files()}
+        self.lock = threading.Lock()
+        self.cache, self.generation = {}, 0
+        self.clients = set()
+        self.search_index, self.search = None, None
+        self.load_routes()
+
+    def load_routes(self):
+        routes = {}
+        build_site(self.pool, self.render_cache, routes=routes, pages=list(self.pages.values()),
+                   page_size=self.page_size)
+        self.routes = routes
+
+    def index_page(self, page):
+        self.search_index.add(page, split_frontmatter(page["source"].read_text(encoding="utf-8"))[1])
+
+    def search_files(self):
+        """Índice de busca montado no primeiro pedido e atualizado por documento depois"""
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            for page in list(self.pages.values()):
+                self.index_page(page)
+        if self.search is None:
+            self.search = {rel: data.encode("utf-8") for rel, data in self.search_index.files().items()}
+        return self.search
+
+    def get(self, path):
+        """(status, content-type, corpo) para o caminho de uma requisição"""
+        rel = unquote(path.split("?", 1)[0].split("#", 1)[0]).strip("/")
+        if rel.startswith(tuple(f"{name}/" for name in ASSET_DIRS)):
+            # Contido no diretório do asset (ex. /static/../blog_generator.py não sai de static/)
+            base = (ROOT / rel.split("/", 1)[0]).resolve()
+            file = (ROOT / rel).resolve()
+            if file.is_relative_to(base) and file.is_file():
+                return 200, mimetypes.guess_type(file.name)[0] or "application/octet-stream", file.read_bytes()
+        elif rel.startswith("katex/"):
+            file = (KATEX_DIST / rel.removeprefix("katex/")).resolve()
+            if file.is_relative_to(KATEX_DIST.resolve()) and file.is_file():
+                return 200, mimetypes.guess_type(file.name)[0] or "application/octet-stream", file.read_bytes()
+        elif rel.startswith("search/"):
+            data = self.search_files().get(rel)
+            if data is not None:
+                return 200, "application/json", data
+        else:
+            key = rel if rel.endswith(".html") else f"{rel}/index.html".lstrip("/")
+            with self.lock:
+                cached, generation = self.cache.get(key), self.generation
+            if cached is not None:
+                return cached
+            render = self.routes.get(key)
+            if render is not None:
+                result = self.render(render)
+                with self.lock:
+                    if generation == self.generation and result[0] == 200:
+                        self.cache[key] = result
+                return result
+        return self.render(self.routes["404.html"], status=404)
+
+    def render(self, render, status=200):
+        try:
+            html = render()
+        except Exception:
+            status, html = 500, f"<!DOCTYPE html><pre>{escape_html(traceback.format_exc())}</pre></body>"
+        html = html.replace("</body>", LIVE_RELOAD + "</body>", 1) if "</body>" in html else html + LIVE_RELOAD
+        return status, "text/html; charset=utf-8", html.encode("utf-8")
+
+    def update(self, changed):
+        """Aplica mudanças do watcher; retorna as URLs a recarregar ("*" = todas)"""
+        invalid, reload_routes = set(), False
+        for path in changed:
+            if not path.is_relative_to(ROOT / "content"):
+                if path == ROOT / "gfm.js":
+                    self.pool.close()  # workers sobem de novo com o gfm.js atualizado
+                    self.render_cache = RenderCache()
+                elif path == ROOT / "blog_generator.py":
+                    print("Aviso: blog_generator.py mudou; reinicie o serve para carregar o código novo")
+                    continue
+                elif _touches_assets([path]):
+                    invalid.add("*")  # servidos direto do disco: só recarrega o navegador
+                    continue
+                reload_routes = True
+                invalid.add("*")
+                continue
+            if path == ROOT / "content" / "_index.md":
+                reload_routes = True
+                invalid.add("index.html")
+                continue
+            # Mesma regra de content_files(): ignora .md fora de articles/ e series/ (ex. rascunhos)
+            is_article = content_kind(path)
+            if is_article is None:
+                continue
+            old = self.pages.pop(path, None)
+            if path.exists():
+                self.pages[path] = load_content_file(path, is_article)
+            new = self.pages.get(path)
+            self.search = None
+            if self.search_index is not None:
+                if old:
+                    self.search_index.remove(old)
+                if new:
+                    self.index_page(new)
+            if old and new and list_digest([old]) == list_digest([new]):
+                self.pages[path] = old  # só o corpo mudou: as rotas continuam válidas
+                invalid.add(f"{old['output']}/index.html")
+            else:
+                reload_routes = True
+                invalid.add("*")
+
+        if reload_routes:
+            self.load_routes()
+        with self.lock:
+            self.generation += 1
+            if "*" in invalid and reload_routes:
+                self.cache.clear()
+            for rel in invalid:
+                self.cache.pop(rel, None)
+            urls = ["*"] if "*" in invalid else sorted(_rel_url(rel) for rel in invalid)
+            for client in self.clients:
+                client.put(json.dumps(urls))
+        return urls
+
+
+class _DevHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/__livereload":
+            return self.events()
+        status, content_type, body = self.server.dev.get(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        dev, events = self.server.dev, queue.Queue()
+        with dev.lock:
+            dev.clients.add(events)
+        try:
+            while True:
+                try:
+                    self.wfile.write(f"data: {events.get(timeout=15)}\n\n".encode("utf-8"))
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")  # detecta abas fechadas
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            with dev.lock:
+                dev.clients.discard(events)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8000, jobs=None, page_size=PAGE_SIZE):
+    """Servidor de desenvolvimento: nada é gravado em public/"""
+    with NodeRenderPool(size=jobs or os.cpu_count() or 1) as pool:
+        start = time.perf_counter()
+        dev = DevServer(pool, page_size)
+        httpd = ThreadingHTTPServer((host, port), _DevHandler)
+        httpd.dev = dev
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        threading.Thread(target=pool.render, args=("",), daemon=True).start()  # já sobe um worker Node
+        print(f"{len(dev.routes)} rotas carregadas em {time.perf_counter() - start:.2f}s")
+        print(f"Servindo em http://{host}:{port} (Ctrl+C para sair)")
+
+        watcher = FileWatcher(debounce=0.05)
+        try:
+            while True:
+                changed = watcher.wait()
+                start = time.perf_counter()
+                names = sorted(str(p.relative_to(ROOT)) for p in changed)
+                try:
+                    urls = dev.update(changed)
+                    print(f"↻ {', '.join(names[:5])}{' ...' if len(names) > 5 else ''}: "
+                          f"{'todas as URLs' if urls == ['*'] else ', '.join(urls)} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+                except Exception as e:
+                    print(f"✗ Erro ao recarregar: {e}")
+        except KeyboardInterrupt:
+            print("\nServidor encerrado")
+        finally:
+            watcher.close()
+            httpd.shutdown()
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gerador do blog estático")
+    parser.add_argument("command", nargs="?", default="build", choices=["build", "watch", "serve", "rollback", "clear-cache", "check-markdown"])
+    parser.add_argument("paths", nargs="*", type=Path, help="check-markdown: arquivos/pastas .md (padrão: content/)")
+    parser.add_argument("--incremental", action="store_true", help="regera apenas saídas cujas dependências mudaram")
+    parser.add_argument("--fingerprint-assets", action="store_true", help="assets com hash no nome (cache imutável)")
+    parser.add_argument("--minify", action="store_true", help="minifica HTML e CSS (KaTeX e <pre>/<code> intactos)")
+    parser.add_argument("--compress", action="store_true", help="gera .gz/.br ao lado de HTML/CSS/JS/SVG")
+    parser.add_argument("--profile", action="store_true", help="mede fases/páginas e grava um trace Chrome (.cache/trace.json)")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="páginas mais lentas listadas no --profile")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help=f"artigos por página nas listas (0 = sem paginação, padrão {PAGE_SIZE})")
+    parser.add_argument("--keep-releases", type=int, default=KEEP_RELEASES, help=f"releases mantidas para rollback (padrão {KEEP_RELEASES})")
+    parser.add_argument("--host", default="127.0.0.1", help="serve: endereço (padrão 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="serve: porta (padrão 8000)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="páginas renderizadas em paralelo (padrão: nº de CPUs)")
+    args = parser.parse_args()
+
+    if args.command == "clear-cache":
+        RenderCache().clear()
+        print("Cache de renderização removido")
+    elif args.command == "check-markdown":
+        with NodeRenderPool(size=1) as pool:
+            failures = check_markdown(args.paths or [ROOT / "content"], pool)
+        for f, md, html, expected in failures[:10]:
+            print(f"\n✗ {f.relative_to(ROOT) if f.is_relative_to(ROOT) else f}\n--- markdown\n{md}\n--- Python\n{html}--- gfm.js\n{expected}")
+        sys.exit(1 if failures else 0)
+    elif args.command == "rollback":
+        print(f"public/ -> release {Releases(ROOT / 'public', args.keep_releases).rollback()}")
+    elif args.command == "serve":
+        serve(args.host, args.port, args.jobs, args.page_size)
+    elif args.command == "watch":
         print("Construindo site inicial...")
-        build_site()
+        pool = NodeRenderPool(size=args.jobs)
+        # Metadados carregados uma vez por sessão; a cada mudança só os .md alterados são relidos
+        pages = {path: load_content_file(path, is_article) for path, is_article in content_files()}
+        # Mesmas opções de saída do build, para o public/ do watch ser igual ao publicado
+        options = dict(jobs=args.jobs, fingerprint_assets=args.fingerprint_assets, compress=args.compress,
+                       minify=args.minify, page_size=args.page_size, stage=False)
+        build_site(pool, incremental=True, pages=list(pages.values()), **options)
         print("✓ Site gerado")
         
-        last_hash = get_files_hash()
-        print("Monitorando mudanças (Ctrl+C para sair)...")
+        watcher = FileWatcher()
+        print(f"Monitorando mudanças via {watcher.mode} (Ctrl+C para sair)...")
         
         try:
             while True:
-                time.sleep(2)
-                current_hash = get_files_hash()
-                if current_hash != last_hash:
-                    print("Mudança detectada, reconstruindo...")
-                    try:
-                        build_site()
-                        print("✓ Site gerado")
-                        last_hash = current_hash
-                    except Exception as e:
-                        print(f"✗ Erro ao gerar site: {e}")
+                changed = watcher.wait()
+                names = sorted(str(p.relative_to(ROOT)) for p in changed)
+                print(f"Mudança detectada: {', '.join(names[:5])}{' ...' if len(names) > 5 else ''}")
+                if ROOT / "gfm.js" in changed:
+                    pool.close()  # workers sobem de novo com o gfm.js atualizado
+                start = time.perf_counter()
+                try:
+                    for path in changed:
+                        is_article = content_kind(path)
+                        if is_article is None:
+                            continue
+                        if path.exists():
+                            pages[path] = load_content_file(path, is_article)
+                        else:
+                            pages.pop(path, None)
+                    build_site(pool, incremental=True, changed=changed, pages=list(pages.values()), **options)
+                    print(f"✓ Site gerado em {time.perf_counter() - start:.2f}s")
+                except Exception as e:
+                    print(f"✗ Erro ao gerar site: {e}")
         except KeyboardInterrupt:
             print("\nMonitoramento encerrado")
+        finally:
+            watcher.close()
+            pool.close()
     else:
-        build_site()
-        print("Site gerado")
\ No newline at end of file
+        if args.profile:
+            PROFILER.enable()
+        build_site(incremental=args.incremental, jobs=args.jobs, fingerprint_assets=args.fingerprint_assets,
+                   compress=args.compress, page_size=args.page_size, keep_releases=args.keep_releases,
+                   minify=args.minify)
+        print("Site gerado")
+        if args.profile:
+            trace = ROOT / ".cache" / "trace.json"
+            PROFILER.write_trace(trace)
+            print(PROFILER.report(args.profile_top))
+            print(f"Trace gravado em {trace.relative_to(ROOT)} (abra em https://ui.perfetto.dev)")
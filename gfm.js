@@ -202,17 +202,70 @@ function processSpoilers(text) {
   return result + text.slice(lastEnd);
 }
 
-try {
-  const input = fs.readFileSync(0, "utf8");
-  if (!input.trim()) process.exit(0);
+/**
+ * Renumera os ids aleatórios do markdown-it-task-lists (task-item-N) em ordem de aparição,
+ * para que o mesmo markdown gere sempre o mesmo HTML (builds paralelos, cache, diff).
+ * Só os atributos id/for do checkbox e do label gerados pelo plugin; texto do autor fica intacto.
+ */
+const TASK_ID = /(<input class="task-list-item-checkbox"[^>]* id="|<label class="task-list-item-label" for=")task-item-(-?\d+)"/g;
+
+function stableTaskIds(html) {
+  const ids = new Map();
+  return html.replace(TASK_ID, (_, attr, n) => {
+    if (!ids.has(n)) ids.set(n, ids.size + 1);
+    return `${attr}task-item-${ids.get(n)}"`;
+  });
+}
 
+/** Renderiza um documento markdown completo (math, markdown-it, spoilers). */
+function renderDocument(input) {
+  if (!input.trim()) return "";
   const { text, blockMaths, inlineMaths } = extractMath(input);
-  let html = md.render(text);
+  let html = stableTaskIds(md.render(text));
   html = injectMath(html, blockMaths, inlineMaths);
-  html = processSpoilers(html);
+  return processSpoilers(html);
+}
+
+/**
+ * Modo worker: processo persistente que recebe documentos em frames pelo stdin.
+ * Requisição: [uint32 BE tamanho][markdown UTF-8].
+ * Resposta:   [uint8 status (0 = ok, 1 = erro)][uint32 BE tamanho][HTML ou mensagem UTF-8].
+ */
+function runWorker() {
+  let pending = Buffer.alloc(0);
 
-  process.stdout.write(html);
-} catch (err) {
-  process.stderr.write(`Erro ao processar Markdown: ${err.message}\n`);
-  process.exit(1);
+  function reply(status, body) {
+    const payload = Buffer.from(body, "utf8");
+    const header = Buffer.alloc(5);
+    header.writeUInt8(status, 0);
+    header.writeUInt32BE(payload.length, 1);
+    process.stdout.write(Buffer.concat([header, payload]));
+  }
+
+  process.stdin.on("data", chunk => {
+    pending = pending.length ? Buffer.concat([pending, chunk]) : chunk;
+    while (pending.length >= 4) {
+      const size = pending.readUInt32BE(0);
+      if (pending.length < 4 + size) break;
+      const input = pending.toString("utf8", 4, 4 + size);
+      pending = pending.subarray(4 + size);
+      try {
+        reply(0, renderDocument(input));
+      } catch (err) {
+        reply(1, `Erro ao processar Markdown: ${err.message}`);
+      }
+    }
+  });
+  process.stdin.on("end", () => process.exit(0));
+}
+
+if (process.argv.includes("--worker")) {
+  runWorker();
+} else {
+  try {
+    process.stdout.write(renderDocument(fs.readFileSync(0, "utf8")));
+  } catch (err) {
+    process.stderr.write(`Erro ao processar Markdown: ${err.message}\n`);
+    process.exit(1);
+  }
 }
@@ -1,8 +1,7 @@
 # artlist.py
 """Lista de artigos ordenada por data (mais recente primeiro)."""
-def render(_, posts):
+def render(site):
     items = ''.join(f'<li><span class="article-date">{p["formatted_date"]}</span> - '
                     f'<a href="{p["url"]}">{p["title"]}</a></li>'
-                    for p in sorted((p for p in posts if p.get("is_article", False)), 
-                                   key=lambda x: x.get("timestamp"), reverse=True))
+                    for p in site.articles_by_date)
     return f'<ul class="article-list">{items}</ul>'
\ No newline at end of file
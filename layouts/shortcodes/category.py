@@ -1,6 +1,6 @@
 # category.py
 """Lista de categorias com links."""
-def render(categories, _):
-    items = ''.join(f'<li><a id="tag_{normalize(c)}" href="/categorias/{normalize(c)}">{c}</a></li>' 
-                    for c in sorted(categories))
+def render(site):
+    items = ''.join(f'<li><a id="tag_{site.slug(c)}" href="/categorias/{site.slug(c)}">{c}</a></li>' 
+                    for c in site.categories)
     return f'<ul class="category-list">{items}</ul>'
\ No newline at end of file
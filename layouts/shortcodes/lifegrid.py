@@ -2,6 +2,9 @@ from typing import List, Dict
 from datetime import datetime
 import json
 
+# Depende da data atual: o build incremental sempre regera páginas que usam este shortcode
+VOLATILE = True
+
 def render(categories: List[str], posts: List[Dict[str, str]], content: str = "", **kwargs) -> str:
     """Gera HTML para um grid de vida, mostrando semanas vividas e futuras até 90 anos."""
     
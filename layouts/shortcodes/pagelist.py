@@ -1,7 +1,6 @@
 # pagelist.py
 """Lista de páginas avulsas (não-artigos) ordenada alfabeticamente."""
-def render(_, posts):
+def render(site):
     items = ''.join(f'<li><a href="{p["url"]}">{p["title"]}</a></li>'
-                    for p in sorted((p for p in posts if not p.get("is_article", False)), 
-                                   key=lambda x: x.get("title", "")))
+                    for p in site.pages_by_title)
     return f'<ul class="page-list">{items}</ul>'
\ No newline at end of file
@@ -0,0 +1,7 @@
+# search.py
+"""Caixa de busca; o índice é gerado no build em /search (ver SearchIndex)."""
+def render(site):
+    return ('<div class="search" data-index="/search">'
+            '<input type="search" class="search-input" placeholder="Buscar nos artigos..." aria-label="Buscar">'
+            '<ul class="search-results article-list"></ul></div>'
+            '<script src="/static/js/search.js" defer></script>')
\ No newline at end of file
@@ -1,7 +1,6 @@
 # serieslist.py
 """Lista de séries disponíveis."""
-def render(_, posts):
-    items = ''.join(f'<li><a href="/series/{normalize(s)}">{s}</a></li>'
-                    for s in sorted(set(p["series"] for p in posts 
-                                       if p.get("is_article", False) and p["series"])))
+def render(site):
+    items = ''.join(f'<li><a href="/series/{site.slug(s)}">{s}</a></li>'
+                    for s in site.series)
     return f'<ul class="series-list">{items}</ul>'
\ No newline at end of file
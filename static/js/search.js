@@ -0,0 +1,100 @@
+// Busca no índice gerado pelo build (SearchIndex em blog_generator.py).
+// Cada consulta baixa index.json uma vez, os shards dos prefixos dos seus termos
+// e só os blocos de docs dos resultados exibidos; tudo fica em cache na página.
+(function () {
+  const box = document.querySelector(".search");
+  if (!box) return;
+
+  const input = box.querySelector(".search-input");
+  const list = box.querySelector(".search-results");
+  const base = box.dataset.index;
+  const maxResults = 30;
+  const files = new Map();
+  let meta = null;
+  let stopwords = new Set();
+  let pending = 0;
+
+  function load(name) {
+    if (!files.has(name)) {
+      files.set(name, fetch(`${base}/${name}.json`).then(r => {
+        if (!r.ok) throw new Error(`${name}: ${r.status}`);
+        return r.json();
+      }));
+    }
+    return files.get(name);
+  }
+
+  // Mesma normalização de search_terms(): sem acentos, minúsculas, palavras com 2+ letras
+  function terms(text) {
+    const folded = text.normalize("NFD").replace(/\p{M}/gu, "").toLowerCase();
+    return (folded.match(/[\p{L}\p{N}_]+/gu) || []).filter(t => t.length > 1 && !stopwords.has(t));
+  }
+
+  function shardKey(term) {
+    return term.slice(0, meta.prefix).replace(/[^a-z0-9]/g, "_");
+  }
+
+  function decode(deltas) {
+    let id = 0;
+    return deltas.map((d, i) => (id = i ? id + d : d));
+  }
+
+  // Ids dos documentos com o termo; o último termo da consulta vale como prefixo
+  async function lookup(term, prefix) {
+    const key = shardKey(term);
+    if (!meta.shards.includes(key)) return new Set();
+    const shard = await load(key);
+    const ids = new Set();
+    for (const [t, deltas] of Object.entries(shard)) {
+      if (t === term || (prefix && t.startsWith(term))) decode(deltas).forEach(id => ids.add(id));
+    }
+    return ids;
+  }
+
+  async function search(query) {
+    if (!meta) {
+      meta = await load("index");
+      stopwords = new Set(meta.stopwords);
+    }
+    const words = terms(query);
+    if (!words.length) return [];
+    const sets = await Promise.all(words.map((w, i) => lookup(w, i === words.length - 1)));
+    sets.sort((a, b) => a.size - b.size);
+    // Ids maiores são os artigos mais novos
+    const ids = [...sets[0]].filter(id => sets.every(s => s.has(id))).sort((a, b) => b - a).slice(0, maxResults);
+    const chunks = await Promise.all([...new Set(ids.map(id => Math.floor(id / meta.chunk)))]
+      .map(async n => [n, await load(`docs-${n}`)]));
+    const docs = new Map(chunks);
+    return ids.map(id => docs.get(Math.floor(id / meta.chunk))[id % meta.chunk]);
+  }
+
+  function show(results, query) {
+    list.replaceChildren(...results.map(([title, url, date]) => {
+      const li = document.createElement("li");
+      if (date) {
+        const span = document.createElement("span");
+        span.className = "article-date";
+        span.textContent = date;
+        li.append(span, " - ");
+      }
+      const a = document.createElement("a");
+      a.href = url;
+      a.textContent = title;
+      li.append(a);
+      return li;
+    }));
+    if (!results.length && terms(query).length) {
+      const li = document.createElement("li");
+      li.textContent = "Nenhum resultado.";
+      list.append(li);
+    }
+  }
+
+  input.addEventListener("input", () => {
+    const query = input.value;
+    const current = ++pending;
+    search(query)
+      .then(results => { if (current === pending) show(results, query); })
+      .catch(err => console.error("Busca:", err));
+  });
+})();